@@ -1,79 +1,126 @@
+import threading
+import time
+from collections import deque
+
 import streamlit as st
-import google.generativeai as genai
-from kite_api import get_holdings, get_positions
-from fmp_api import get_latest_price
+from snapshot import get_snapshot
+from prices import with_live_prices
+from portfolio_analytics import build_frame, digest
+from fmp_api import get_profiles
+import context_store
+import kite_registry
+import llm_cache
+import instrumentation
+
+# -----------------------------
+# 🔑 Gemini client (created on first use)
+# -----------------------------
+MODEL_NAME = "gemini-2.5-flash"
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Process-wide Gemini model, configured on the first generation rather than at import."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai  # heavy: only AI Insights / Chat pay for it
+                genai.configure(api_key=st.secrets.get("gemini_api_key"))
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
+
+def set_model(model):
+    """Use `model` (anything with generate_content) instead of the configured Gemini client, e.g. a stand-in."""
+    global _model
+    with _model_lock:
+        _model = model
+
+DIGEST_TOP_N = 10  # lines per TOP/BOTTOM/LARGEST table in prompt digests
+
+# Process-wide record of recent generations for latency tracking
+LLM_TIMINGS = deque(maxlen=500)
+
 
 # -----------------------------
-# 🔑 Initialize Gemini client
+# ⏱️ Streaming generation
 # -----------------------------
-genai.configure(api_key=st.secrets.get("gemini_api_key"))
-model = genai.GenerativeModel("gemini-2.5-flash")
+def _record_timing(kind, ttft, total, cached=False):
+    entry = {"kind": kind, "ttft": ttft, "total": total, "cached": cached, "at": time.time()}
+    LLM_TIMINGS.append(entry)
+    st.session_state[f"last_{kind}_timing"] = entry
+
+
+def _generate(prompt, kind):
+    """Yield Gemini response text as it streams in, recording time-to-first-token."""
+    start = time.perf_counter()
+    ttft = None
+    with instrumentation.track(f"gemini.{kind}") as call:
+        for chunk in get_model().generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:  # chunk without text parts (e.g. safety/finish metadata)
+                continue
+            if not text:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            call.payload += len(text.encode())
+            yield text
+    _record_timing(kind, ttft, time.perf_counter() - start)
+
+
+def last_timing(kind):
+    """Timing of this session's most recent `kind` ("insights"/"chat") generation, if any."""
+    return st.session_state.get(f"last_{kind}_timing")
+
 
 # --- Safe Session Initialization ---
 if "chat_history" not in st.session_state:
     st.session_state["chat_history"] = []
 
-if "context_memory" not in st.session_state:
-    st.session_state["context_memory"] = ""
-
 
 # -----------------------------
 # 🧩 Helper: Context Management
 # -----------------------------
 def add_to_context(new_context: str):
-    """Safely append context data to Streamlit session."""
-    current_context = st.session_state.get("context_memory", "")
-    st.session_state["context_memory"] = current_context + f"\n{new_context}\n"
+    """Remember a fact for later chats (deduplicated, bounded by the context budget)."""
+    context_store.add_fact(new_context)
 
 
 # -----------------------------
 # 📊 Portfolio Snapshot
 # -----------------------------
-def get_portfolio_snapshot():
-    """Fetch current holdings & positions with FMP fallback."""
-    snapshot = []
-    holdings = get_holdings() or []
-    positions = get_positions() or []
-
-    if not isinstance(holdings, list):
-        holdings = [holdings]
-    if not isinstance(positions, list):
-        positions = [positions]
+def _portfolio_frame():
+    snap = get_snapshot()
+    return build_frame(snap["holdings"], snap["positions"], with_live_prices(snap["prices"]))
 
-    all_data = holdings + positions
-    for item in all_data:
-        symbol = item.get("symbol") or item.get("tradingsymbol")
-        qty = item.get("quantity", 0)
-        last_price = item.get("last_price", 0) or 0
 
-        # ✅ fallback to FMP if Kite price missing
-        if not last_price or last_price == 0:
-            last_price = get_latest_price(symbol)
+def get_portfolio_snapshot():
+    """Build the AI view of the shared portfolio snapshot (holdings + positions)."""
+    cols = ["symbol", "quantity", "average_price", "last_price", "value", "unrealized_pnl", "pnl_pct"]
+    return _portfolio_frame()[cols].round(2).to_dict("records")
 
-        snapshot.append({
-            "symbol": symbol,
-            "quantity": qty,
-            "last_price": round(last_price, 2),
-            "value": round(qty * last_price, 2),
-        })
 
-    return snapshot
+def get_portfolio_digest(top_n=DIGEST_TOP_N):
+    """Compact precomputed digest (totals, concentration, sector/cap weights, top/bottom lines) for prompts."""
+    frame = _portfolio_frame()
+    return digest(frame, get_profiles(frame["symbol"].unique().tolist()), top_n=top_n)
 
 
 # -----------------------------
 # 🧠 Portfolio Insights via AI (Gemini)
 # -----------------------------
-def ai_portfolio_insights():
-    """Generate AI-based portfolio insights using Gemini."""
-    portfolio_data = get_portfolio_snapshot()
-    add_to_context(str(portfolio_data))
-
-    prompt = f"""
+INSIGHTS_PROMPT = """
 You are a financial analyst AI assisting an investor in reviewing their equity portfolio.
 
 Your task is to perform a deep portfolio analysis based on the data provided below.
 
-Portfolio Data:
+Portfolio Data (precomputed digest; values in ₹, weights and P&L in %, tables are CSV with a header row.
+TOTALS and CONCENTRATION cover the whole book, even when tables list only the top/bottom lines):
 {portfolio_data}
 
 Analyze and provide a structured report covering the following points:
@@ -115,44 +162,92 @@ Return only the analysis in markdown format.
 """
 
 
-    try:
-        response = model.generate_content(prompt)
-        insights = response.text
-    except Exception as e:
-        insights = f"Error fetching insights: {e}"
+def _cache_user():
+    return kite_registry.user_id() or f"session:{kite_registry.session_key()}"
 
-    add_to_context(f"Portfolio Insights: {insights}")
-    return insights
+
+def ai_portfolio_insights(force_refresh=False, stream=False):
+    """
+    Generate AI-based portfolio insights using Gemini (cached per portfolio fingerprint).
+    With stream=True, returns a generator of text chunks for st.write_stream.
+    """
+    chunks = _insights_chunks(force_refresh)
+    return chunks if stream else "".join(chunks)
+
+
+def _insights_chunks(force_refresh):
+    portfolio_rows = get_portfolio_snapshot()
+    portfolio_data = get_portfolio_digest()
+    context_store.set_portfolio(portfolio_data)
+
+    # The cache is host-wide: key by user as well as by the holdings and cost basis the digest is built from
+    cache_key = llm_cache.fingerprint(
+        "insights", _cache_user(), INSIGHTS_PROMPT, llm_cache.portfolio_fingerprint(portfolio_rows)
+    )
+    insights = None if force_refresh else llm_cache.get(cache_key)
+
+    if insights is not None:
+        _record_timing("insights", 0.0, 0.0, cached=True)
+        yield insights
+    else:
+        prompt = INSIGHTS_PROMPT.format(portfolio_data=portfolio_data)
+        parts = []
+        try:
+            for text in _generate(prompt, "insights"):
+                parts.append(text)
+                yield text
+            insights = "".join(parts)
+            llm_cache.put(cache_key, insights, llm_cache.INSIGHTS_TTL)
+        except Exception as e:
+            insights = f"Error fetching insights: {e}"
+            yield insights if not parts else f"\n\n{insights}"
+
+    if not insights.startswith("Error"):
+        context_store.set_insights(insights)
 
 
 # -----------------------------
 # 💬 AI Chat Interface (Gemini)
 # -----------------------------
-def ai_chat(user_query: str):
-    """Chat interface for financial assistant."""
-    context_memory = st.session_state.get("context_memory", "")
-    chat_history = st.session_state.get("chat_history", [])
-
-    system_prompt = f"""
-You are a helpful financial assistant. Use the following context when responding:
-{context_memory}
-"""
-
-    # Combine system prompt + last few messages
-    history_text = "\n".join(
-        [f"{msg['role'].capitalize()}: {msg['content']}" for msg in chat_history[-5:]]
+def ai_chat(user_query: str, force_refresh=False, stream=False):
+    """
+    Chat interface for financial assistant.
+    With stream=True, returns a generator of text chunks for st.write_stream.
+    """
+    chunks = _chat_chunks(user_query, force_refresh)
+    return chunks if stream else "".join(chunks)
+
+
+def _chat_chunks(user_query, force_refresh):
+    # The cache is host-wide: reuse an answer only for the same user, question, portfolio and conversation
+    cache_key = llm_cache.fingerprint(
+        "chat", _cache_user(),
+        " ".join(user_query.lower().split()), llm_cache.portfolio_fingerprint(get_portfolio_snapshot()),
+        context_store.context_fingerprint(),
     )
-    full_prompt = f"{system_prompt}\n\n{history_text}\n\nUser: {user_query}\nAssistant:"
-
-    try:
-        response = model.generate_content(full_prompt)
-        answer = response.text
-    except Exception as e:
-        answer = f"Error: {e}"
+    answer = None if force_refresh else llm_cache.get(cache_key)
+
+    if answer is not None:
+        _record_timing("chat", 0.0, 0.0, cached=True)
+        yield answer
+    else:
+        # Bounded prompt: latest snapshot/insights, deduped facts, summary + recent turns
+        full_prompt, _ = context_store.build_prompt(user_query)
+        parts = []
+        try:
+            for text in _generate(full_prompt, "chat"):
+                parts.append(text)
+                yield text
+            answer = "".join(parts)
+            llm_cache.put(cache_key, answer, llm_cache.CHAT_TTL)
+        except Exception as e:
+            answer = f"Error: {e}"
+            yield answer if not parts else f"\n\n{answer}"
 
     # update session state safely
-    chat_history.append({"role": "user", "content": user_query})
-    chat_history.append({"role": "assistant", "content": answer})
-    st.session_state["chat_history"] = chat_history
+    context_store.add_turn("user", user_query)
+    context_store.add_turn("assistant", answer)
+    st.session_state["chat_history"] = context_store.turns()
+
 
-    return answer
+instrumentation.instrument_module(globals(), skip={"get_model", "set_model", "last_timing", "add_to_context"})
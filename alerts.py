@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+import ticker
+
+# --- Persistent price alerts shared by every session on this host ---
+DB_PATH = Path(st.secrets.get("data_dir", ".cache")) / "alerts.sqlite"
+FIRED_LOG_LIMIT = 200  # rows returned by fired_log
+
+_lock = threading.Lock()   # guards the in-memory index below
+_loaded = False
+_alerts = {}               # alert id -> row dict for every active alert
+_index = {}                # (key, "above"|"below") -> ([thresholds ascending], [alert ids in the same order])
+_initialized = False
+
+
+# -----------------------------
+# 🗄️ SQLite backend
+# -----------------------------
+def _connect():
+    global _initialized
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=5)
+    conn.row_factory = sqlite3.Row
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY, user TEXT NOT NULL, key TEXT NOT NULL,
+            direction TEXT NOT NULL, threshold REAL NOT NULL, note TEXT,
+            created_at REAL NOT NULL, active INTEGER NOT NULL DEFAULT 1)""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS fired (
+            id INTEGER PRIMARY KEY, alert_id INTEGER NOT NULL, user TEXT NOT NULL, key TEXT NOT NULL,
+            direction TEXT NOT NULL, threshold REAL NOT NULL, price REAL NOT NULL, note TEXT,
+            fired_at REAL NOT NULL, delivered INTEGER NOT NULL DEFAULT 0)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts(user, active)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_fired_user ON fired(user, delivered)")
+        _initialized = True
+    return conn
+
+
+@contextmanager
+def _db():
+    conn = _connect()
+    try:
+        with conn:  # commit/rollback
+            yield conn
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# 🗂️ Sorted threshold index
+# -----------------------------
+def _insert(alert):
+    thresholds, ids = _index.setdefault((alert["key"], alert["direction"]), ([], []))
+    pos = bisect_right(thresholds, alert["threshold"])
+    thresholds.insert(pos, alert["threshold"])
+    ids.insert(pos, alert["id"])
+    _alerts[alert["id"]] = alert
+
+
+def _remove(alert):
+    thresholds, ids = _index.get((alert["key"], alert["direction"]), ([], []))
+    pos = bisect_left(thresholds, alert["threshold"])
+    while pos < len(ids) and thresholds[pos] == alert["threshold"]:
+        if ids[pos] == alert["id"]:
+            del thresholds[pos], ids[pos]
+            break
+        pos += 1
+    _alerts.pop(alert["id"], None)
+
+
+def _ensure_loaded():
+    """Build the index from every active alert once per process."""
+    global _loaded
+    if _loaded:
+        return
+    with _db() as conn:
+        rows = conn.execute("SELECT * FROM alerts WHERE active = 1").fetchall()
+    with _lock:
+        if not _loaded:
+            for row in rows:
+                _insert(dict(row))
+            _loaded = True
+
+
+def _pop_triggered(key, price):
+    """Remove and return alerts on `key` crossed by `price`: two bisects, no scan."""
+    fired = []
+    above = _index.get((key, "above"))
+    if above and above[0] and above[0][0] <= price:
+        pos = bisect_right(above[0], price)   # thresholds <= price
+        fired += above[1][:pos]
+        del above[0][:pos], above[1][:pos]
+    below = _index.get((key, "below"))
+    if below and below[0] and below[0][-1] >= price:
+        pos = bisect_left(below[0], price)    # thresholds >= price
+        fired += below[1][pos:]
+        del below[0][pos:], below[1][pos:]
+    return [_alerts.pop(alert_id) for alert_id in fired]
+
+
+# -----------------------------
+# ⚡ Evaluation
+# -----------------------------
+def evaluate(updates):
+    """
+    Check [(key, price), ...] against the index, deactivate every alert that
+    fired and log it. Runs on the ticker thread for each tick batch.
+    Returns the fired alerts.
+    """
+    if not _loaded:
+        _ensure_loaded()
+    now = time.time()
+    fired = []
+    with _lock:
+        for key, price in updates:
+            if price:
+                fired += [(alert, float(price)) for alert in _pop_triggered(key, float(price))]
+    if fired:
+        with _db() as conn:
+            conn.executemany("UPDATE alerts SET active = 0 WHERE id = ?", [(a["id"],) for a, _ in fired])
+            conn.executemany(
+                "INSERT INTO fired (alert_id, user, key, direction, threshold, price, note, fired_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(a["id"], a["user"], a["key"], a["direction"], a["threshold"], price, a["note"], now)
+                 for a, price in fired])
+    return [alert for alert, _ in fired]
+
+
+ticker.add_listener(evaluate)
+
+
+# -----------------------------
+# 🔔 Alert management
+# -----------------------------
+def add(user, key, threshold, note="", direction=None, last_price=None):
+    """
+    Store an alert on "EXCHANGE:SYMBOL". `direction` is "above" or "below";
+    when omitted it is inferred from `last_price` (the side the price must cross to),
+    and without a known price the caller is asked to pick one (error dict).
+    """
+    threshold = float(threshold)
+    if direction not in ("above", "below"):
+        if not last_price:
+            return {"error": f"No current price for {key}; choose Above or Below instead of Auto."}
+        direction = "below" if threshold < float(last_price) else "above"
+    _ensure_loaded()
+    with _db() as conn:
+        cur = conn.execute(
+            "INSERT INTO alerts (user, key, direction, threshold, note, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (user, key, direction, threshold, note, time.time()))
+        alert = dict(conn.execute("SELECT * FROM alerts WHERE id = ?", (cur.lastrowid,)).fetchone())
+    with _lock:
+        _insert(alert)
+    return alert
+
+
+def delete(user, alert_id):
+    """Deactivate one of `user`'s alerts; returns False if it isn't theirs or already inactive."""
+    _ensure_loaded()
+    with _db() as conn:
+        updated = conn.execute("UPDATE alerts SET active = 0 WHERE id = ? AND user = ? AND active = 1",
+                               (alert_id, user)).rowcount
+    with _lock:
+        alert = _alerts.get(alert_id)
+        if updated and alert:
+            _remove(alert)
+    return bool(updated)
+
+
+def active(user):
+    """`user`'s active alerts, oldest first."""
+    with _db() as conn:
+        rows = conn.execute("SELECT id, key, direction, threshold, note, created_at FROM alerts "
+                            "WHERE user = ? AND active = 1 ORDER BY id", (user,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def watched_keys(user=None):
+    """Instrument keys with at least one active alert (for `user`, or anyone)."""
+    _ensure_loaded()
+    with _lock:
+        return sorted({a["key"] for a in _alerts.values() if user is None or a["user"] == user})
+
+
+def fired_log(user, limit=FIRED_LOG_LIMIT):
+    """Most recent fired alerts for `user`, newest first."""
+    with _db() as conn:
+        rows = conn.execute("SELECT alert_id, key, direction, threshold, price, note, fired_at FROM fired "
+                            "WHERE user = ? ORDER BY id DESC LIMIT ?", (user, limit)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def pop_notifications(user):
+    """Fired alerts `user` hasn't been shown yet; marks them delivered."""
+    with _db() as conn:
+        rows = conn.execute("SELECT id, key, direction, threshold, price, note FROM fired "
+                            "WHERE user = ? AND delivered = 0 ORDER BY id", (user,)).fetchall()
+        if rows:
+            conn.executemany("UPDATE fired SET delivered = 1 WHERE id = ?", [(r["id"],) for r in rows])
+    return [dict(r) for r in rows]
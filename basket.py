@@ -0,0 +1,221 @@
+import io
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+import kite_api
+from concurrency import thread_pool
+
+LEG_COLUMNS = ["symbol", "transaction_type", "quantity", "order_type", "price", "product", "exchange"]
+LEG_DEFAULTS = {"transaction_type": "BUY", "order_type": "MARKET", "price": 0.0, "product": "CNC", "exchange": "NSE"}
+
+# Order-book states after which a leg will not change again
+TERMINAL_STATUSES = {"COMPLETE", "REJECTED", "CANCELLED"}
+NOT_SUBMITTED = "NOT_SUBMITTED"  # BUY legs held back because a SELL leg didn't complete
+
+# Concurrent submissions; the scheduler's "order" bucket still caps the rate at Kite's limit
+SUBMIT_WORKERS = 8
+
+
+# -----------------------------
+# 🧾 Basket Legs
+# -----------------------------
+def legs_frame(rows=None):
+    """Empty or filled table of legs with every LEG_COLUMNS column, for the editor."""
+    df = pd.DataFrame.from_records(rows or [], columns=LEG_COLUMNS)
+    return df.astype({"quantity": "Int64", "price": "float64"})
+
+
+def read_csv(data):
+    """Legs from an uploaded CSV (bytes or text); unknown columns are dropped."""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    df = pd.read_csv(io.StringIO(data))
+    df.columns = [c.strip().lower() for c in df.columns]
+    return legs_frame(df.reindex(columns=LEG_COLUMNS).to_dict("records"))
+
+
+def normalize_legs(rows):
+    """
+    Clean table rows into order legs. Returns (legs, errors); blank rows are
+    skipped and rows that can't be placed are reported by their position.
+    """
+    legs, errors = [], []
+    for i, row in enumerate(rows, start=1):
+        row = {k: v for k, v in dict(row).items() if not pd.isna(v)}
+        symbol = str(row.get("symbol") or "").upper().strip()
+        if not symbol:
+            continue
+        leg = {**LEG_DEFAULTS, **{k: row[k] for k in LEG_COLUMNS if k in row and row[k] != ""}, "symbol": symbol}
+        for key in ("transaction_type", "order_type", "product", "exchange"):
+            leg[key] = str(leg[key]).upper().strip()
+        try:
+            leg["quantity"] = int(leg.get("quantity") or 0)
+            leg["price"] = float(leg["price"] or 0)
+        except (TypeError, ValueError):
+            errors.append(f"Leg {i} ({symbol}): quantity/price must be numbers")
+            continue
+        if leg["quantity"] <= 0:
+            errors.append(f"Leg {i} ({symbol}): quantity must be positive")
+        elif leg["transaction_type"] not in ("BUY", "SELL"):
+            errors.append(f"Leg {i} ({symbol}): transaction_type must be BUY or SELL")
+        elif leg["order_type"] == "LIMIT" and leg["price"] <= 0:
+            errors.append(f"Leg {i} ({symbol}): LIMIT orders need a price")
+        else:
+            legs.append(leg)
+    return legs, errors
+
+
+def legs_from_allocation(current_qty, prices, targets, capital=None):
+    """
+    Orders that move the book to `targets` ({symbol: weight %}). `current_qty` and
+    `prices` are {symbol: value}; `capital` defaults to the current book value.
+    Symbols held but absent from `targets` are sold down to zero.
+    Returns (legs, errors) with whole-share MARKET legs, sells first.
+    """
+    symbols = list(dict.fromkeys([*current_qty, *targets]))
+    book = pd.DataFrame({
+        "qty": [float(current_qty.get(s, 0) or 0) for s in symbols],
+        "price": [float(prices.get(s, 0) or 0) for s in symbols],
+        "target": [float(targets.get(s, 0) or 0) for s in symbols],
+    }, index=symbols)
+
+    unpriced = book.index[book["price"] <= 0].tolist()
+    errors = [f"No price for {', '.join(unpriced)}"] if unpriced else []
+    book = book[book["price"] > 0]
+
+    capital = float((book["qty"] * book["price"]).sum()) if capital is None else float(capital)
+    target_qty = np.floor(capital * book["target"] / 100 / book["price"])
+    delta = (target_qty - book["qty"]).astype(int)
+
+    legs = [{**LEG_DEFAULTS, "symbol": s, "transaction_type": "SELL" if d < 0 else "BUY", "quantity": abs(int(d))}
+            for s, d in delta[delta != 0].items()]
+    legs.sort(key=lambda leg: leg["transaction_type"] != "SELL")  # sells free up funds for the buys
+    return legs, errors
+
+
+# -----------------------------
+# 💰 Pre-trade Margin Check
+# -----------------------------
+def _margin_params(leg):
+    return {
+        "exchange": leg["exchange"],
+        "tradingsymbol": leg["symbol"],
+        "transaction_type": leg["transaction_type"],
+        "variety": "regular",
+        "product": leg["product"],
+        "order_type": leg["order_type"],
+        "quantity": leg["quantity"],
+        "price": leg["price"],
+    }
+
+
+def check_margins(legs):
+    """
+    Validate the whole basket with one basket_order_margins call.
+    Returns {"required", "final", "available", "sufficient", "orders"} or an error dict.
+    """
+    margins = kite_api.get_basket_margins([_margin_params(leg) for leg in legs])
+    if "error" in margins:
+        return margins
+
+    funds = kite_api.get_funds()
+    available = None
+    if isinstance(funds, dict) and "error" not in funds:
+        available = float((funds.get("equity") or {}).get("net") or 0)
+    required = float((margins.get("initial") or {}).get("total") or 0)
+    final = float((margins.get("final") or {}).get("total") or required)
+    return {
+        "required": required,
+        "final": final,
+        "available": available,
+        "sufficient": None if available is None else available >= final,
+        "orders": margins.get("orders", []),
+    }
+
+
+# -----------------------------
+# 🚀 Submission & Status Tracking
+# -----------------------------
+def _place(leg):
+    return kite_api.place_order(leg["symbol"], leg["quantity"], leg["order_type"], leg["transaction_type"],
+                                leg["price"], product=leg["product"], exchange=leg["exchange"])
+
+
+def _place_concurrently(legs, results, indices):
+    with thread_pool(SUBMIT_WORKERS) as pool:
+        futures = {pool.submit(_place, legs[i]): i for i in indices}
+        for future in as_completed(futures):
+            result = results[futures[future]]
+            res = future.result()
+            if res.get("success"):
+                result.update(order_id=res["order_id"], status="SUBMITTED")
+            else:
+                result.update(status="FAILED", message=res.get("error", ""))
+
+
+def submit(legs, sell_timeout=30):
+    """
+    Place the SELL legs, wait (up to `sell_timeout`s) until they are filled or rejected
+    so their proceeds are available, then place the BUY legs, only if every SELL
+    completed; otherwise the BUY legs are returned as NOT_SUBMITTED. Legs within each side go
+    concurrently (Kite's order rate limit is enforced by the scheduler).
+    Returns one result per leg, in leg order, with order_id/status/message.
+    """
+    results = [{**leg, "order_id": None, "status": "PENDING", "message": ""} for leg in legs]
+    sells = [i for i, leg in enumerate(legs) if leg["transaction_type"] == "SELL"]
+    buys = [i for i, leg in enumerate(legs) if leg["transaction_type"] != "SELL"]
+
+    if sells:
+        _place_concurrently(legs, results, sells)
+        for _ in track([results[i] for i in sells], timeout=sell_timeout):
+            pass
+        unfilled = [results[i]["symbol"] for i in sells if results[i]["status"] != "COMPLETE"]
+        if unfilled and buys:
+            # The margin check assumed these sells would net; buying anyway would over-allocate the book
+            for i in buys:
+                results[i].update(status=NOT_SUBMITTED,
+                                  message=f"Not placed: SELL leg(s) {', '.join(unfilled)} did not complete")
+            return results
+    if buys:
+        _place_concurrently(legs, results, buys)
+    return results
+
+
+def skipped(results):
+    """Legs that submit() deliberately held back."""
+    return [r for r in results if r["status"] == NOT_SUBMITTED]
+
+
+def is_done(results):
+    return all(r["status"] in TERMINAL_STATUSES or r["status"] in ("FAILED", NOT_SUBMITTED) for r in results)
+
+
+def refresh_status(results):
+    """Update legs in place from one order-book read. Returns the same list."""
+    pending = [r["order_id"] for r in results if r["order_id"] and r["status"] not in TERMINAL_STATUSES]
+    if not pending:
+        return results
+    book = kite_api.get_order_statuses(pending)
+    if "error" in book:
+        return results
+    for r in results:
+        order = book.get(r["order_id"])
+        if order:
+            r["status"] = order.get("status", r["status"])
+            r["filled_quantity"] = order.get("filled_quantity", 0)
+            r["average_price"] = order.get("average_price", 0)
+            r["message"] = order.get("status_message") or r["message"]
+    return results
+
+
+def track(results, timeout=30, interval=1.0):
+    """Yield the legs after each order-book poll until every leg is filled/rejected or `timeout` passes."""
+    deadline = time.monotonic() + timeout
+    while True:
+        yield refresh_status(results)
+        if is_done(results) or time.monotonic() >= deadline:
+            return
+        time.sleep(interval)
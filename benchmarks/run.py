@@ -0,0 +1,235 @@
+"""
+End-to-end performance benchmarks against offline stand-ins.
+
+Drives main.py headlessly with Streamlit's AppTest through the Portfolio,
+Stock Data, Mutual Funds, AI Insights and Chat flows at several portfolio
+sizes, and reports wall time, upstream calls and peak Python memory per flow.
+
+Exits non-zero when a flow raises, exceeds its upstream call budget, or is
+slower / heavier than the saved baseline by more than the tolerance.
+
+    python benchmarks/run.py                                  # 10, 100, 1000, 5000 lines
+    python benchmarks/run.py --sizes 10,100 --latency 0.05 --error-rate 0.02
+    python benchmarks/run.py --update-baseline                # record benchmarks/baseline.json
+    python benchmarks/run.py --require-baseline               # CI: a missing baseline is a failure
+"""
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from stand_ins import Book, FakeGeminiModel, StandInServer  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+RUN_TIMEOUT = 300         # seconds AppTest waits for one script run
+TIME_SLACK = 0.05         # seconds of absolute noise allowed on top of the relative tolerance
+
+
+# -----------------------------
+# 🧭 Flows
+# -----------------------------
+def _by_label(elements, label):
+    return next(e for e in elements if e.label == label)
+
+
+def _goto(at, section):
+    _by_label(at.sidebar.radio, "Select Section").set_value(section)
+
+
+def portfolio(at):
+    _goto(at, "Portfolio")
+
+
+def stock_data(at):
+    _goto(at, "Stock Data")
+    at.run()
+    _by_label(at.text_input, "Enter NSE Symbol (e.g., RELIANCE)").input("RELIANCE")
+    _by_label(at.button, "Fetch Data").click()
+
+
+def mutual_funds(at):
+    _goto(at, "Mutual Funds")
+    at.run()
+    _by_label(at.button, "Fetch Fund").click()
+
+
+def ai_insights(at):
+    _goto(at, "AI Insights")
+    at.run()
+    _by_label(at.checkbox, "Force refresh (skip cached insights)").check()
+    _by_label(at.button, "Get Insights").click()
+
+
+def chat(at):
+    _goto(at, "Chat")
+    at.run()
+    _by_label(at.text_input, "Ask me anything about your portfolio:").input("Which holding is the largest?")
+    _by_label(at.checkbox, "Force a fresh answer").check()
+    _by_label(at.button, "Send").click()
+
+
+# Upper bounds on upstream calls per flow for a book of n lines
+FLOWS = {
+    "portfolio": (portfolio, lambda n: {
+        "kite:/portfolio/holdings": 1, "kite:/portfolio/positions": 1,
+        "kite:/quote/ltp": math.ceil(n / 1000), "fmp:quote": math.ceil(n / 200),
+    }),
+    "stock_data": (stock_data, lambda n: {
+        "fmp:historical-price-full": 1, "fmp:profile": 1, "fmp:quote": 2, "kite:/quote/ltp": 1,
+    }),
+    "mutual_funds": (mutual_funds, lambda n: {"mfapi": 1}),
+    "ai_insights": (ai_insights, lambda n: {
+        "gemini": 1, "fmp:profile": math.ceil(n / 200),
+        "kite:/portfolio/holdings": 1, "kite:/portfolio/positions": 1,
+    }),
+    "chat": (chat, lambda n: {"gemini": 1, "kite:/portfolio/holdings": 1, "kite:/portfolio/positions": 1}),
+}
+
+
+# -----------------------------
+# 🏃 Runner
+# -----------------------------
+def _new_app(server, data_dir):
+    at = AppTest.from_file(str(ROOT / "main.py"), default_timeout=RUN_TIMEOUT)
+    at.secrets.update({
+        "kite_api_key": "stand-in", "kite_api_secret": "stand-in",
+        "kite_root": f"{server.url}/kite",
+        "fmp_api_key": "stand-in", "fmp_base_url": f"{server.url}/fmp",
+        "mfapi_base_url": f"{server.url}/mfapi",
+        "gemini_api_key": "stand-in",
+        "data_dir": data_dir,
+    })
+    return at
+
+
+def _install_fakes(gemini):
+    """
+    Swap in the in-process stand-ins for whichever app modules are loaded so far.
+    main.py imports sections lazily inside the AppTest run, so this is repeated before each measured run.
+    """
+    ai_agent, ticker = sys.modules.get("ai_agent"), sys.modules.get("ticker")
+    if ai_agent is not None:
+        ai_agent.set_model(gemini)  # get_model() returns it instead of configuring the real client
+    if ticker is not None:
+        ticker.ensure_started = lambda *args, **kwargs: None  # no Kite WebSocket offline; REST paths are measured
+
+
+def _login(at, gemini):
+    _by_label(at.sidebar.text_input, "Paste Request Token here:").input("stand-in-request")
+    _by_label(at.sidebar.button, "Generate Access Token").click()
+    at.run()
+    _install_fakes(gemini)
+
+
+def measure(at, flow, server, gemini):
+    server.reset()
+    gemini.reset()
+    tracemalloc.start()
+    start = time.perf_counter()
+    flow(at)
+    _install_fakes(gemini)
+    at.run()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls = dict(server.calls)
+    if gemini.calls:
+        calls["gemini"] = gemini.calls
+    return {
+        "wall_s": round(wall, 4),
+        "peak_mb": round(peak / 2 ** 20, 2),
+        "calls": calls,
+        "errors_injected": sum(server.errors.values()),
+        "prompt_chars": gemini.prompt_chars,
+        "exceptions": [e.message for e in at.exception],
+    }
+
+
+def check(name, size, result, budget, baseline, tolerance, enforce_budget, require_baseline=False):
+    problems = [f"raised: {msg}" for msg in result["exceptions"]]
+    if enforce_budget:
+        problems += [f"{route}: {result['calls'].get(route, 0)} calls > budget {limit}"
+                     for route, limit in budget.items() if result["calls"].get(route, 0) > limit]
+    base = baseline.get(f"{name}@{size}")
+    if base:
+        if result["wall_s"] > base["wall_s"] * (1 + tolerance) + TIME_SLACK:
+            problems.append(f"wall {result['wall_s']:.3f}s vs baseline {base['wall_s']:.3f}s")
+        if result["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+            problems.append(f"peak {result['peak_mb']:.1f}MB vs baseline {base['peak_mb']:.1f}MB")
+    elif require_baseline:
+        problems.append("no baseline entry (record one with --update-baseline)")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="portfolio line counts")
+    parser.add_argument("--flows", default=",".join(FLOWS), help="subset of " + ", ".join(FLOWS))
+    parser.add_argument("--latency", type=float, default=0.0, help="mean upstream latency per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream requests that 503")
+    parser.add_argument("--llm-ttft", type=float, default=0.4, help="stand-in Gemini time to first token (s)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="fail when the baseline file or a flow@size entry is missing (CI)")
+    parser.add_argument("--json", type=Path, help="also write full results here")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    flows = [f for f in args.flows.split(",") if f]
+    if args.require_baseline and not args.update_baseline and not args.baseline.exists():
+        print(f"FAIL baseline {args.baseline} is missing; record it with --update-baseline and commit it")
+        return 1
+    baseline = {} if args.update_baseline or not args.baseline.exists() else json.loads(args.baseline.read_text())
+    enforce_budget = args.error_rate == 0  # retries after injected errors legitimately add calls
+
+    server = StandInServer(latency=args.latency, error_rate=args.error_rate).start()
+    gemini = FakeGeminiModel(ttft=args.llm_ttft, error_rate=args.error_rate)
+    results, failures = {}, []
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            for size in sizes:
+                server.book = Book(size, prefix=f"S{size}X")
+                at = _new_app(server, data_dir)
+                at.run()
+                _login(at, gemini)
+
+                for name in flows:
+                    flow, budget = FLOWS[name]
+                    result = measure(at, flow, server, gemini)
+                    results[f"{name}@{size}"] = result
+                    problems = check(name, size, result, budget(size), baseline, args.tolerance, enforce_budget,
+                                     args.require_baseline and not args.update_baseline)
+                    failures += [f"{name}@{size}: {p}" for p in problems]
+                    print(f"{name:>13} @ {size:>5} lines  {result['wall_s']:8.3f}s  {result['peak_mb']:8.1f}MB  "
+                          f"{sum(result['calls'].values()):4d} calls  {'FAIL' if problems else 'ok'}")
+    finally:
+        server.stop()
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(
+            {k: {"wall_s": r["wall_s"], "peak_mb": r["peak_mb"]} for k, r in results.items()}, indent=2))
+        print(f"Baseline written to {args.baseline}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
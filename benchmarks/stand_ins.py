@@ -0,0 +1,270 @@
+"""
+Offline stand-ins for the app's upstream services.
+
+One local HTTP server speaks just enough of Kite Connect (/kite), FMP (/fmp)
+and mfapi.in (/mfapi) for the app's flows, with synthetic data, configurable
+latency and error injection, and per-route call counters. Gemini is replaced
+in-process by FakeGeminiModel, which streams canned chunks.
+"""
+import datetime
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HISTORY_DAYS = 5 * 365
+
+
+# -----------------------------
+# 🧪 Synthetic market data
+# -----------------------------
+def _price(symbol):
+    return 50 + (sum(map(ord, symbol)) * 37 % 2950)
+
+
+def _business_days(start, end):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def _walk(symbol, start, end, base):
+    """Deterministic random walk per symbol, so incremental fetches line up with earlier ones."""
+    rng = random.Random(symbol)
+    first = datetime.date.today() - datetime.timedelta(days=HISTORY_DAYS)
+    price = base
+    for day in _business_days(first, end):
+        price = max(1.0, price * (1 + rng.gauss(0.0004, 0.015)))
+        if day >= start:
+            yield day, round(price, 2)
+
+
+class Book:
+    """Holdings/positions for a synthetic account of `lines` instruments."""
+
+    def __init__(self, lines, prefix="SYM", unpriced=0.1, seed=0):
+        rng = random.Random(seed)
+        self.symbols = [f"{prefix}{i:04d}" for i in range(lines)]
+        self.tokens = {s: 100000 + i for i, s in enumerate(self.symbols)}
+        self.holdings = []
+        for s in self.symbols:
+            price = _price(s)
+            self.holdings.append({
+                "tradingsymbol": s, "exchange": "NSE", "instrument_token": self.tokens[s],
+                "quantity": rng.randint(1, 500), "t1_quantity": 0,
+                "average_price": round(price * rng.uniform(0.6, 1.3), 2),
+                "last_price": 0 if rng.random() < unpriced else price,
+                "close_price": round(price * rng.uniform(0.97, 1.03), 2),
+                "pnl": 0, "day_change": 0,
+            })
+        self.positions = [{**h, "quantity": rng.randint(-50, 50)} for h in self.holdings[: max(1, lines // 20)]]
+
+
+# -----------------------------
+# 🌐 Stand-in HTTP server
+# -----------------------------
+class StandInServer:
+    """
+    Threaded local server. `latency` (seconds, ±50% jitter) delays every reply;
+    `error_rate` answers that share of requests with a 503.
+    """
+
+    def __init__(self, book=None, latency=0.0, error_rate=0.0, seed=0):
+        self.book = book or Book(10)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self.errors = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+            def do_GET(self):
+                server._handle(self)
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+
+    # --- dispatch ---
+    def _handle(self, req):
+        parsed = urlparse(req.path)
+        query = parse_qs(parsed.query)
+        length = int(req.headers.get("Content-Length") or 0)
+        if length:
+            req.rfile.read(length)
+        service, _, path = parsed.path.lstrip("/").partition("/")
+        route = self._route_name(service, path)
+
+        with self._lock:
+            self.calls[route] += 1
+            fail = self._rng.random() < self.error_rate
+            delay = self.latency * self._rng.uniform(0.5, 1.5) if self.latency else 0
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with self._lock:
+                self.errors[route] += 1
+            return self._send(req, 503, {"status": "error", "error_type": "NetworkException",
+                                         "message": "injected failure"})
+
+        handler = {"kite": self._kite, "fmp": self._fmp, "mfapi": self._mfapi}.get(service)
+        status, body, ctype = handler(path, query) if handler else (404, {"error": "unknown service"}, "json")
+        self._send(req, status, body, ctype)
+
+    @staticmethod
+    def _route_name(service, path):
+        if service == "fmp":
+            return f"fmp:{path.split('/')[0]}"
+        if service == "mfapi":
+            return "mfapi"
+        return f"{service}:/{path}"
+
+    @staticmethod
+    def _send(req, status, body, ctype="json"):
+        if ctype == "csv":
+            payload, content_type = body.encode(), "text/csv"
+        else:
+            payload, content_type = json.dumps(body).encode(), "application/json"
+        req.send_response(status)
+        req.send_header("Content-Type", content_type)
+        req.send_header("Content-Length", str(len(payload)))
+        req.end_headers()
+        req.wfile.write(payload)
+
+    # --- Kite Connect ---
+    def _kite(self, path, query):
+        book = self.book
+        if path == "session/token":
+            data = {"access_token": "stand-in-token", "user_id": f"BENCH{len(book.symbols)}",
+                    "login_time": "2026-01-01 09:15:00", "public_token": "x"}
+        elif path == "portfolio/holdings":
+            data = book.holdings
+        elif path == "portfolio/positions":
+            data = {"net": book.positions, "day": []}
+        elif path == "quote/ltp":
+            data = {}
+            for key in query.get("i", []):
+                symbol = key.split(":", 1)[-1]
+                if symbol in book.tokens:
+                    data[key] = {"instrument_token": book.tokens[symbol], "last_price": _price(symbol)}
+        elif path == "user/margins":
+            data = {"equity": {"net": 1e7, "available": {"cash": 1e7}}, "commodity": {}}
+        elif path == "instruments":
+            rows = ["instrument_token,exchange_token,tradingsymbol,name,last_price,expiry,strike,"
+                    "tick_size,lot_size,instrument_type,segment,exchange"]
+            rows += [f"{t},{t},{s},{s},0,,0,0.05,1,EQ,NSE,NSE" for s, t in book.tokens.items()]
+            return 200, "\n".join(rows), "csv"
+        elif path in ("orders", "gtt/triggers"):
+            data = []
+        else:
+            return 404, {"status": "error", "error_type": "GeneralException", "message": f"no route {path}"}, "json"
+        return 200, {"status": "success", "data": data}, "json"
+
+    # --- FMP ---
+    def _fmp(self, path, query):
+        endpoint, _, arg = path.partition("/")
+        symbols = [s for s in arg.split(",") if s]
+        if endpoint == "historical-price-full":
+            symbol = symbols[0]
+            start = datetime.date.fromisoformat(query["from"][0]) if "from" in query else \
+                datetime.date.today() - datetime.timedelta(days=HISTORY_DAYS)
+            bars = [{"date": d.isoformat(), "open": p, "high": p * 1.01, "low": p * 0.99, "close": p, "volume": 100000}
+                    for d, p in _walk(symbol, start, datetime.date.today(), _price(symbol.split(".")[0]))]
+            return 200, {"symbol": symbol, "historical": bars[::-1]}, "json"
+        if endpoint == "quote":
+            return 200, [{"symbol": s, "price": _price(s.split(".")[0]), "marketCap": 1e11, "pe": 25.0,
+                          "yearHigh": 1.2 * _price(s.split(".")[0]), "yearLow": 0.8 * _price(s.split(".")[0])}
+                         for s in symbols], "json"
+        if endpoint == "profile":
+            return 200, [{"symbol": s, "companyName": s, "sector": ("Tech", "Banks", "Energy")[len(s) % 3],
+                          "industry": "Synthetic", "mktCap": 1e9 * (len(s) * 37 % 500), "beta": 1.0}
+                         for s in symbols], "json"
+        return 404, {"error": f"no route {endpoint}"}, "json"
+
+    # --- mfapi.in ---
+    def _mfapi(self, path, query):
+        code = path.strip("/")
+        start = datetime.date.fromisoformat(query["startDate"][0]) if "startDate" in query else \
+            datetime.date.today() - datetime.timedelta(days=HISTORY_DAYS)
+        navs = [{"date": d.strftime("%d-%m-%Y"), "nav": f"{p:.4f}"}
+                for d, p in _walk(code, start, datetime.date.today(), 10.0)]
+        meta = {"fund_house": "Stand-in AMC", "scheme_type": "Open Ended", "scheme_category": "Equity",
+                "scheme_code": code, "scheme_name": f"Fund {code}"}
+        return 200, {"meta": meta, "data": navs[::-1], "status": "SUCCESS"}, "json"
+
+
+# -----------------------------
+# 🤖 Gemini stand-in
+# -----------------------------
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Drop-in for genai.GenerativeModel: streams `chunks` pieces after `ttft` seconds."""
+
+    def __init__(self, ttft=0.4, chunk_delay=0.02, chunks=20, error_rate=0.0, seed=0):
+        self.ttft = ttft
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.error_rate = error_rate
+        self.calls = 0
+        self.prompt_chars = 0
+        self._rng = random.Random(seed)
+
+    def reset(self):
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        if self._rng.random() < self.error_rate:
+            raise RuntimeError("injected Gemini failure")
+        pieces = [f"Stand-in insight {i}. " for i in range(self.chunks)]
+        if not stream:
+            time.sleep(self.ttft + self.chunk_delay * self.chunks)
+            return _Chunk("".join(pieces))
+        return self._stream(pieces)
+
+    def _stream(self, pieces):
+        time.sleep(self.ttft)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield _Chunk(piece)
@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark: first render of main.py, and of each section, in a fresh process.
+
+Every measurement runs in its own interpreter so nothing is already imported.
+Fails when a page pulls in a heavy dependency it doesn't need (e.g. Gemini or
+kiteconnect just to open Mutual Funds) or when the first render exceeds the
+startup budget.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget 1.5 --sections "Mutual Funds,Portfolio"
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SECTIONS = ["Stock Data", "Mutual Funds", "Portfolio", "AI Insights", "Chat", "Kite Tools"]
+HEAVY = ["google.generativeai", "kiteconnect", "plotly", "yfinance", "twisted", "autobahn", "pandas"]
+
+# Dependencies a section must not load just by being opened (its buttons may load more)
+FORBIDDEN = {
+    "Stock Data": ["google.generativeai", "kiteconnect", "plotly", "yfinance"],
+    "Mutual Funds": ["google.generativeai", "kiteconnect", "plotly", "yfinance"],
+    "Portfolio": ["google.generativeai", "plotly", "yfinance"],
+    "AI Insights": ["google.generativeai", "plotly", "yfinance"],
+    "Chat": ["google.generativeai", "plotly", "yfinance"],
+    "Kite Tools": ["google.generativeai", "plotly", "yfinance"],
+}
+DEFAULT_BUDGET = 2.0  # seconds for the first script run, excluding the streamlit import itself
+
+
+def _loaded(name):
+    return any(m == name or m.startswith(name + ".") for m in sys.modules)
+
+
+def child(section):
+    """Measure one cold render in this (fresh) process and print JSON."""
+    sys.path.insert(0, str(ROOT))
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        at = AppTest.from_file(str(ROOT / "main.py"), default_timeout=120)
+        at.secrets.update({"kite_api_key": "stand-in", "kite_api_secret": "stand-in",
+                           "fmp_api_key": "stand-in", "gemini_api_key": "stand-in", "data_dir": data_dir})
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+        section_s = 0.0
+        if section != SECTIONS[0]:
+            next(r for r in at.sidebar.radio if r.label == "Select Section").set_value(section)
+            start = time.perf_counter()
+            at.run()
+            section_s = time.perf_counter() - start
+        print(json.dumps({
+            "section": section, "first_run_s": round(first, 4), "section_run_s": round(section_s, 4),
+            "heavy": [h for h in HEAVY if _loaded(h)],
+            "exceptions": [e.message for e in at.exception],
+        }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", default=",".join(SECTIONS))
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="max seconds for the first run")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child)
+        return 0
+
+    failures = []
+    for section in [s for s in args.sections.split(",") if s]:
+        out = subprocess.run([sys.executable, __file__, "--child", section],
+                             capture_output=True, text=True, cwd=ROOT)
+        if out.returncode:
+            failures.append(f"{section}: child failed\n{out.stderr[-2000:]}")
+            continue
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        problems = [f"raised: {msg}" for msg in result["exceptions"]]
+        problems += [f"loaded {dep}" for dep in FORBIDDEN.get(section, []) if dep in result["heavy"]]
+        if result["first_run_s"] > args.budget:
+            problems.append(f"first run {result['first_run_s']:.2f}s > budget {args.budget:.2f}s")
+        failures += [f"{section}: {p}" for p in problems]
+        print(f"{section:>13}  first run {result['first_run_s']:6.3f}s  section {result['section_run_s']:6.3f}s  "
+              f"heavy: {', '.join(result['heavy']) or '-'}  {'FAIL' if problems else 'ok'}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Upper bound on threads any single page fan-out may use
+MAX_WORKERS = 16
+
+
+def _attach_ctx(ctx):
+    # st.cache_data / st.warning inside workers need the caller's script context
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def thread_pool(max_workers=MAX_WORKERS):
+    """Bounded executor whose workers run inside the current Streamlit session."""
+    return ThreadPoolExecutor(
+        max_workers=min(max_workers, MAX_WORKERS),
+        initializer=_attach_ctx,
+        initargs=(get_script_run_ctx(),),
+    )
@@ -0,0 +1,147 @@
+import hashlib
+import json
+
+import streamlit as st
+
+# --- Prompt budget (approximate tokens) ---
+TOKEN_BUDGET = int(st.secrets.get("llm_context_tokens", 6000))
+PORTFOLIO_BUDGET = 2000   # latest snapshot / digest
+INSIGHTS_BUDGET = 1200    # latest insights report
+SUMMARY_BUDGET = 600      # compressed older turns
+FACTS_BUDGET = 600        # remembered facts, newest kept first
+QUERY_BUDGET = 800        # the user's question itself
+MAX_FACTS = 50
+MAX_TURNS = 12            # raw turns retained in session; older ones are folded into the summary
+SUMMARY_LINE_CHARS = 160
+
+_KEY = "llm_context"
+
+
+# -----------------------------
+# 🔢 Token counting
+# -----------------------------
+def count_tokens(text: str) -> int:
+    """Cheap local estimate (~4 chars/token for English, floor of 1.3 tokens/word)."""
+    if not text:
+        return 0
+    return max(len(text) // 4, int(len(text.split()) * 1.3))
+
+
+def _truncate(text: str, budget: int) -> str:
+    if count_tokens(text) <= budget:
+        return text
+    limit = max(budget, 0) * 4
+    while limit > 0:
+        cut = text[:limit].rsplit("\n", 1)[0] + "\n…[truncated]"
+        if count_tokens(cut) <= budget:
+            return cut
+        limit = int(limit * 0.9)  # word-dense text counts above 4 chars/token
+    return ""
+
+
+def _facts_within(facts, budget):
+    """Newest facts that fit in `budget`, kept in insertion order."""
+    kept, used = [], 0
+    for fact in reversed(facts):
+        cost = count_tokens(f"- {fact}")
+        if used + cost > budget:
+            break
+        kept.append(fact)
+        used += cost
+    return kept[::-1]
+
+
+# -----------------------------
+# 🗂️ Session-scoped store
+# -----------------------------
+def _store():
+    if _KEY not in st.session_state:
+        st.session_state[_KEY] = {"portfolio": "", "insights": "", "facts": {}, "summary": [], "turns": []}
+    return st.session_state[_KEY]
+
+
+def set_portfolio(snapshot: str):
+    """Replace (never append) the portfolio snapshot the model sees."""
+    _store()["portfolio"] = _truncate(snapshot, PORTFOLIO_BUDGET)
+
+
+def set_insights(insights: str):
+    """Keep only the most recent insights report."""
+    _store()["insights"] = _truncate(insights, INSIGHTS_BUDGET)
+
+
+def add_fact(fact: str):
+    """Remember a short fact once; repeats are ignored and the oldest facts are evicted first."""
+    fact = fact.strip()
+    if not fact:
+        return
+    facts = _store()["facts"]
+    key = hashlib.sha1(" ".join(fact.lower().split()).encode()).hexdigest()
+    facts.pop(key, None)
+    facts[key] = fact
+    while len(facts) > MAX_FACTS:
+        facts.pop(next(iter(facts)))
+
+
+def add_turn(role: str, content: str):
+    """Record a chat turn; turns past MAX_TURNS are compressed into the running summary."""
+    store = _store()
+    store["turns"].append({"role": role, "content": content})
+    while len(store["turns"]) > MAX_TURNS:
+        _summarize(store, store["turns"].pop(0))
+
+
+def _summarize(store, turn):
+    line = " ".join(turn["content"].split())[:SUMMARY_LINE_CHARS]
+    store["summary"].append(f"{turn['role'].capitalize()}: {line}")
+    while store["summary"] and count_tokens("\n".join(store["summary"])) > SUMMARY_BUDGET:
+        store["summary"].pop(0)
+
+
+def turns():
+    return list(_store()["turns"])
+
+
+def context_fingerprint():
+    """Hash of the conversation context a chat answer depends on: insights, facts, summary and turns."""
+    store = _store()
+    blob = json.dumps([store["insights"], list(store["facts"].values()), store["summary"], store["turns"]])
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+# -----------------------------
+# 🧱 Prompt assembly
+# -----------------------------
+def build_prompt(user_query: str, system: str = "You are a helpful financial assistant.", budget: int = TOKEN_BUDGET):
+    """
+    Assemble a prompt that never exceeds `budget` (estimated) tokens: fixed sections
+    first (portfolio, insights, newest facts, summary; trimmed if they alone overflow),
+    then as many recent turns as fit, newest first. Returns (prompt, token_count).
+    """
+    store = _store()
+    sections = [system, "Use the following context when responding:"]
+    if store["portfolio"]:
+        sections.append(f"Current portfolio:\n{store['portfolio']}")
+    if store["insights"]:
+        sections.append(f"Latest portfolio insights:\n{store['insights']}")
+    facts = _facts_within(list(store["facts"].values()), FACTS_BUDGET)
+    if facts:
+        sections.append("Known facts:\n" + "\n".join(f"- {f}" for f in facts))
+    if store["summary"]:
+        sections.append("Earlier conversation (summarized):\n" + "\n".join(store["summary"]))
+
+    tail = f"User: {_truncate(user_query, min(QUERY_BUDGET, budget // 2))}\nAssistant:"
+    head = _truncate("\n\n".join(sections), budget - count_tokens(tail))
+    used = count_tokens(head) + count_tokens(tail)
+
+    history = []
+    for turn in reversed(store["turns"]):
+        line = f"{turn['role'].capitalize()}: {turn['content']}"
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        history.append(line)
+        used += cost
+
+    prompt = "\n\n".join([head, "\n".join(reversed(history)), tail])
+    return prompt, used
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import instrumentation
+from ai_agent import LLM_TIMINGS
+from kite_api import get_scheduler_stats
+from market_data import breaker_states
+
+
+def _llm_summary():
+    rows = []
+    for kind in sorted({t["kind"] for t in LLM_TIMINGS}):
+        timings = [t for t in LLM_TIMINGS if t["kind"] == kind]
+        ttft = np.array([t["ttft"] for t in timings if not t["cached"] and t["ttft"] is not None])
+        rows.append({
+            "kind": kind, "generations": len(timings),
+            "cached_ratio": round(sum(t["cached"] for t in timings) / len(timings), 3),
+            "ttft_p50_s": round(float(np.percentile(ttft, 50)), 3) if ttft.size else None,
+            "ttft_p95_s": round(float(np.percentile(ttft, 95)), 3) if ttft.size else None,
+        })
+    return rows
+
+
+# --- Diagnostics Panel ---
+def show_diagnostics():
+    """Per-endpoint latency/error/cache table, scheduler and LLM stats, and this rerun's call trace."""
+    with st.expander("🩺 Diagnostics"):
+        st.markdown("**Endpoints** (process-wide since start)")
+        summary = instrumentation.summary()
+        if summary:
+            st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No calls recorded yet.")
+
+        st.markdown("**Kite rate limiter**")
+        st.dataframe(pd.DataFrame(get_scheduler_stats()).T, use_container_width=True)
+
+        st.markdown("**Market data providers** (circuit breakers and hedging)")
+        st.dataframe(pd.DataFrame(breaker_states()), use_container_width=True, hide_index=True)
+
+        llm = _llm_summary()
+        if llm:
+            st.markdown("**Gemini**")
+            st.dataframe(pd.DataFrame(llm), use_container_width=True, hide_index=True)
+
+        events = instrumentation.trace()
+        st.markdown(f"**This rerun** ({len(events)} calls)")
+        if events:
+            st.dataframe(pd.DataFrame(events), use_container_width=True, hide_index=True)
+
+        c1, c2 = st.columns(2)
+        c1.download_button("Prometheus metrics", instrumentation.prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+        c2.download_button("Rerun trace (JSON)", json.dumps(events, indent=2),
+                           file_name="trace.json", mime="application/json")
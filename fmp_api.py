@@ -1,15 +1,19 @@
-import requests
 import pandas as pd
 import streamlit as st
+import http_client
+import instrumentation
+from concurrency import thread_pool
 
 FMP_API_KEY = st.secrets.get("fmp_api_key", "YOUR_FMP_KEY")  # store in secrets.toml
-BASE_URL = "https://financialmodelingprep.com/api/v3"
+BASE_URL = st.secrets.get("fmp_base_url", "https://financialmodelingprep.com/api/v3")
 
-# --- Historical Stock Data ---
-def get_historical_data(symbol="RELIANCE", period="6mo"):
-    """Fetch historical OHLC data for a symbol."""
-    url = f"{BASE_URL}/historical-price-full/{symbol}?apikey={FMP_API_KEY}"
-    res = requests.get(url).json()
+# --- Historical Stock Data (stored via market_data.get_history) ---
+def fetch_history(symbol, start=None):
+    """Download OHLC bars from FMP, only those on/after `start` when given."""
+    params = {"apikey": FMP_API_KEY}
+    if start is not None:
+        params["from"] = start.strftime("%Y-%m-%d")
+    res = http_client.get_json(f"{BASE_URL}/historical-price-full/{symbol}", params=params)
     if "historical" in res:
         df = pd.DataFrame(res["historical"])
         df["date"] = pd.to_datetime(df["date"])
@@ -18,24 +22,27 @@ def get_historical_data(symbol="RELIANCE", period="6mo"):
     return pd.DataFrame()
 
 # --- Company Info ---
-def get_company_info(symbol="RELIANCE"):
-    query_symbol = symbol if "." in symbol else f"{symbol}.NS"
-
-    profile_data, quote_data = {}, {}
-
+def _first_record(endpoint, query_symbol, strict=False):
     try:
-        profile_res = requests.get(f"{BASE_URL}/profile/{query_symbol}?apikey={FMP_API_KEY}").json()
-        if profile_res:
-            profile_data = profile_res[0]
+        res = http_client.get_json(f"{BASE_URL}/{endpoint}/{query_symbol}", params={"apikey": FMP_API_KEY})
+        if res:
+            return res[0]
     except:
-        profile_data = {}
+        if strict:
+            raise
+    return {}
 
-    try:
-        quote_res = requests.get(f"{BASE_URL}/quote/{query_symbol}?apikey={FMP_API_KEY}").json()
-        if quote_res:
-            quote_data = quote_res[0]
-    except:
-        quote_data = {}
+def get_company_profile(symbol="RELIANCE", strict=False):
+    """Raw FMP /profile record (empty dict on failure; strict=True raises instead)."""
+    return _first_record("profile", symbol if "." in symbol else f"{symbol}.NS", strict)
+
+def get_company_quote(symbol="RELIANCE", strict=False):
+    """Raw FMP /quote record (empty dict on failure; strict=True raises instead)."""
+    return _first_record("quote", symbol if "." in symbol else f"{symbol}.NS", strict)
+
+def format_company_info(symbol, profile_data, quote_data):
+    """Merge /profile and /quote records into the display dict."""
+    query_symbol = symbol if "." in symbol else f"{symbol}.NS"
 
     # Use fallback values if null
     return {
@@ -53,8 +60,15 @@ def get_company_info(symbol="RELIANCE"):
         "Website": profile_data.get("website"),
     }
 
+def get_company_info(symbol="RELIANCE", strict=False):
+    """Fetch /profile and /quote concurrently and merge them."""
+    with thread_pool(2) as pool:
+        profile = pool.submit(get_company_profile, symbol, strict)
+        quote = pool.submit(get_company_quote, symbol, strict)
+        return format_company_info(symbol, profile.result(), quote.result())
+
 # --- Latest Price Fallback ---
-@st.cache_data(ttl=3600)
+@instrumentation.cache_data("fmp_api.get_latest_price", ttl=3600)
 def get_latest_price(symbol: str):
     """
     Fetch latest stock price for an Indian stock using FMP.
@@ -65,14 +79,76 @@ def get_latest_price(symbol: str):
 
     # normalize: ensure we query FMP with .NS suffix
     query_symbol = symbol if "." in symbol else f"{symbol}.NS"
-    url = f"{BASE_URL}/quote/{query_symbol}?apikey={FMP_API_KEY}"
-
     try:
-        res = requests.get(url, timeout=5)
-        data = res.json()
+        data = http_client.get_json(f"{BASE_URL}/quote/{query_symbol}", params={"apikey": FMP_API_KEY})
         if isinstance(data, list) and len(data) > 0:
             return round(float(data[0].get("price", 0)), 2)
     except Exception as e:
         st.warning(f"FMP price fetch failed for {symbol}: {e}")
 
     return 0.0
+
+# --- Batched Latest Prices ---
+QUOTE_BATCH_SIZE = 200  # keeps the comma-separated URL well under server limits
+
+@instrumentation.cache_data("fmp_api.get_latest_prices", ttl=3600)
+def _fetch_quotes(query_symbols: tuple):
+    prices = {}
+    for i in range(0, len(query_symbols), QUOTE_BATCH_SIZE):
+        batch = ",".join(query_symbols[i:i + QUOTE_BATCH_SIZE])
+        try:
+            data = http_client.get_json(f"{BASE_URL}/quote/{batch}", params={"apikey": FMP_API_KEY})
+        except Exception as e:
+            st.warning(f"FMP batch price fetch failed: {e}")
+            continue
+        if isinstance(data, list):
+            for q in data:
+                if q.get("symbol") and q.get("price"):
+                    prices[q["symbol"]] = round(float(q["price"]), 2)
+    return prices
+
+def get_latest_prices(symbols):
+    """
+    Fetch latest prices for many symbols with one comma-separated /quote request.
+    Returns {symbol: price} keyed by the symbols as passed in; misses are omitted.
+    """
+    query_map = {}
+    for symbol in dict.fromkeys(symbols):
+        if symbol:
+            query_map[symbol if "." in symbol else f"{symbol}.NS"] = symbol
+    if not query_map:
+        return {}
+
+    quotes = _fetch_quotes(tuple(sorted(query_map)))
+    return {query_map[q]: price for q, price in quotes.items() if q in query_map}
+
+# --- Batched Company Profiles ---
+@instrumentation.cache_data("fmp_api.get_profiles", ttl=86400)
+def _fetch_profiles(query_symbols: tuple):
+    profiles = {}
+    for i in range(0, len(query_symbols), QUOTE_BATCH_SIZE):
+        batch = ",".join(query_symbols[i:i + QUOTE_BATCH_SIZE])
+        try:
+            data = http_client.get_json(f"{BASE_URL}/profile/{batch}", params={"apikey": FMP_API_KEY})
+        except Exception:
+            continue
+        if isinstance(data, list):
+            for p in data:
+                if p.get("symbol"):
+                    profiles[p["symbol"]] = {"sector": p.get("sector"), "mktCap": p.get("mktCap")}
+    return profiles
+
+def get_profiles(symbols):
+    """Sector and market cap for many symbols via one comma-separated /profile request: {symbol: {...}}."""
+    query_map = {}
+    for symbol in dict.fromkeys(symbols):
+        if symbol:
+            query_map[symbol if "." in symbol else f"{symbol}.NS"] = symbol
+    if not query_map:
+        return {}
+
+    profiles = _fetch_profiles(tuple(sorted(query_map)))
+    return {query_map[q]: p for q, p in profiles.items() if q in query_map}
+
+
+instrumentation.instrument_module(globals(), skip={"format_company_info"})
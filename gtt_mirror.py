@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+import kite_api
+
+# Seconds between background resyncs; mutations force the next read to resync
+SYNC_INTERVAL = float(st.secrets.get("gtt_sync_seconds", 60))
+
+COLUMNS = ["id", "symbol", "exchange", "type", "status", "trigger", "last_price",
+           "transaction_type", "quantity", "price", "created_at", "updated_at", "expires_at"]
+CANCELLED_STATUSES = {"cancelled", "deleted", "disabled", "expired", "rejected"}
+
+_lock = threading.Lock()
+_mirrors = {}   # client key -> {"rows", "synced_at", "dirty", "diff"}
+
+
+# -----------------------------
+# 🧰 Helpers
+# -----------------------------
+def _flatten(gtt):
+    """One table row per GTT (first leg's order details)."""
+    condition = gtt.get("condition") or {}
+    order = (gtt.get("orders") or [{}])[0]
+    return {
+        "id": gtt.get("id"),
+        "symbol": condition.get("tradingsymbol"),
+        "exchange": condition.get("exchange"),
+        "type": gtt.get("type"),
+        "status": gtt.get("status"),
+        "trigger": ", ".join(f"{v:g}" for v in condition.get("trigger_values") or []),
+        "last_price": condition.get("last_price"),
+        "transaction_type": order.get("transaction_type"),
+        "quantity": order.get("quantity"),
+        "price": order.get("price"),
+        "created_at": gtt.get("created_at"),
+        "updated_at": str(gtt.get("updated_at") or ""),
+        "expires_at": gtt.get("expires_at"),
+    }
+
+
+def _empty_diff():
+    return {"added": [], "triggered": [], "cancelled": [], "changed": []}
+
+
+def _diff(old, new):
+    """What happened between two {id: row} states."""
+    diff = _empty_diff()
+    for gtt_id, row in new.items():
+        before = old.get(gtt_id)
+        if before is None or before.get("pending"):
+            if before is None:
+                diff["added"].append(row)
+        elif before["updated_at"] != row["updated_at"] or before["status"] != row["status"]:
+            if row["status"] == "triggered" and before["status"] != "triggered":
+                diff["triggered"].append(row)
+            elif row["status"] in CANCELLED_STATUSES and before["status"] not in CANCELLED_STATUSES:
+                diff["cancelled"].append(row)
+            else:
+                diff["changed"].append(row)
+    # GTTs that vanished from Kite's list were deleted upstream
+    diff["cancelled"] += [{**row, "status": "deleted"} for gtt_id, row in old.items()
+                          if gtt_id not in new and not row.get("pending")]
+    return diff
+
+
+def _mirror(key):
+    return _mirrors.setdefault(key, {"rows": {}, "synced_at": 0.0, "dirty": True, "diff": _empty_diff()})
+
+
+# -----------------------------
+# 🔄 Sync
+# -----------------------------
+def sync(force=False):
+    """
+    Refresh the mirror from Kite when it's older than SYNC_INTERVAL, was mutated,
+    or `force` is set. Rows whose updated_at didn't change are kept as they are.
+    Returns an error dict on failure, else None.
+    """
+    key = kite_api.client_key()
+    with _lock:
+        mirror = _mirror(key)
+        if not (force or mirror["dirty"] or time.time() - mirror["synced_at"] >= SYNC_INTERVAL):
+            return None
+
+    gtts = kite_api.list_gtt_orders()
+    if isinstance(gtts, dict) and "error" in gtts:
+        return gtts
+
+    with _lock:
+        old = mirror["rows"]
+        rows = {}
+        for gtt in gtts:
+            gtt_id = gtt.get("id")
+            kept = old.get(gtt_id)
+            if kept and not kept.get("pending") and kept["updated_at"] == str(gtt.get("updated_at") or ""):
+                rows[gtt_id] = kept
+            else:
+                rows[gtt_id] = _flatten(gtt)
+        # The first sync only seeds the mirror; everything in it isn't news
+        mirror["diff"] = _diff(old, rows) if mirror["synced_at"] else _empty_diff()
+        mirror.update(rows=rows, synced_at=time.time(), dirty=False)
+    return None
+
+
+def create(symbol, trigger_price, qty):
+    """Place a GTT and show it right away; the next sync replaces the placeholder with Kite's row."""
+    res = kite_api.create_gtt(symbol, trigger_price, qty)
+    with _lock:
+        mirror = _mirror(kite_api.client_key())
+        mirror["dirty"] = True
+        gtt_id = res["gtt_id"].get("trigger_id") if isinstance(res.get("gtt_id"), dict) else res.get("gtt_id")
+        if res.get("success") and gtt_id is not None:
+            mirror["rows"][gtt_id] = {
+                **dict.fromkeys(COLUMNS), "id": gtt_id, "symbol": symbol, "exchange": "NSE", "type": "single",
+                "status": "active", "trigger": f"{float(trigger_price):g}", "transaction_type": "BUY",
+                "quantity": int(qty), "price": float(trigger_price), "updated_at": "", "pending": True,
+            }
+    return res
+
+
+# -----------------------------
+# 📋 Reads
+# -----------------------------
+def frame():
+    """Mirror as a DataFrame, newest first; pending (optimistic) rows are flagged."""
+    with _lock:
+        rows = list(_mirror(kite_api.client_key())["rows"].values())
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS + ["pending"])
+    df["pending"] = df["pending"].fillna(False).astype(bool)
+    return df.sort_values("id", ascending=False, ignore_index=True)
+
+
+def last_diff():
+    with _lock:
+        return _mirror(kite_api.client_key())["diff"]
+
+
+def synced_at():
+    with _lock:
+        return _mirror(kite_api.client_key())["synced_at"]
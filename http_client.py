@@ -0,0 +1,68 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation
+
+# --- Timeouts (seconds) ---
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 15
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# --- Pool / retry tuning ---
+POOL_CONNECTIONS = 10   # distinct hosts kept alive
+POOL_MAXSIZE = 32       # concurrent sockets per host (one per Streamlit worker thread)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+# -----------------------------
+# 🌐 Shared pooled session
+# -----------------------------
+def _build_session():
+    retry = Retry(
+        total=3,
+        connect=3,
+        read=2,
+        status=3,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,          # spread retries so workers don't stampede upstream
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json"})
+    return s
+
+
+session = _build_session()
+
+# HTTPAdapter kwargs for KiteConnect(pool=...). No retries: Kite calls include order POSTs.
+KITE_POOL = {"pool_connections": POOL_CONNECTIONS, "pool_maxsize": POOL_MAXSIZE}
+KITE_TIMEOUT = READ_TIMEOUT
+
+
+def get(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """GET through the shared keep-alive pool with timeouts and retry/backoff."""
+    start = time.perf_counter()
+    try:
+        res = session.get(url, params=params, timeout=timeout)
+    except Exception as e:
+        instrumentation.track_http(url, error=type(e).__name__, seconds=time.perf_counter() - start)
+        raise
+    instrumentation.track_http(url, res, seconds=time.perf_counter() - start)
+    return res
+
+
+def get_json(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """GET and decode JSON; raises on network errors and non-2xx responses."""
+    res = get(url, params=params, timeout=timeout)
+    res.raise_for_status()
+    return res.json()
@@ -0,0 +1,294 @@
+import functools
+import inspect
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Latency histogram bucket upper bounds (seconds), Prometheus-style
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+TRACE_LIMIT = 2000   # events kept per rerun trace
+_TRACE_KEY = "_diagnostics_trace"
+
+_lock = threading.Lock()
+_stats = {}                   # endpoint -> _Stats
+_local = threading.local()    # .missed: set when a cache_data body ran on this thread
+
+
+class _Stats:
+    __slots__ = ("layer", "calls", "errors", "buckets", "total", "max", "payload", "cache_hits", "cache_misses")
+
+    def __init__(self, layer):
+        self.layer = layer
+        self.calls = 0
+        self.errors = Counter()
+        self.buckets = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.max = 0.0
+        self.payload = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def _get(endpoint, layer):
+    stats = _stats.get(endpoint)
+    if stats is None:
+        with _lock:
+            stats = _stats.setdefault(endpoint, _Stats(layer))
+    return stats
+
+
+# -----------------------------
+# 📝 Recording
+# -----------------------------
+def record(endpoint, seconds, error=None, payload=0, layer="upstream"):
+    """Count one call: latency bucket, error class (if any) and payload bytes."""
+    stats = _get(endpoint, layer)
+    with _lock:
+        stats.calls += 1
+        stats.total += seconds
+        stats.max = max(stats.max, seconds)
+        stats.buckets[next(i for i, bound in enumerate(BUCKETS) if seconds <= bound)] += 1
+        stats.payload += payload
+        if error:
+            stats.errors[error] += 1
+    _trace_event(endpoint, layer, seconds, error, payload)
+
+
+def record_cache(endpoint, hit, count=1):
+    stats = _get(endpoint, "provider")
+    with _lock:
+        if hit:
+            stats.cache_hits += count
+        else:
+            stats.cache_misses += count
+
+
+def _error_class(result):
+    """Provider functions flatten failures into {"error": ...} dicts or "Error ..." strings."""
+    if isinstance(result, dict) and "error" in result:
+        return "ErrorResult"
+    if isinstance(result, str) and result.startswith("Error"):
+        return "ErrorResult"
+    return None
+
+
+class _Call:
+    __slots__ = ("payload", "error")
+
+    def __init__(self):
+        self.payload = 0
+        self.error = None
+
+
+@contextmanager
+def track(endpoint, layer="upstream"):
+    """Time the block as one call to `endpoint`; set `.payload`/`.error` on the yielded handle."""
+    call = _Call()
+    start = time.perf_counter()
+    try:
+        yield call
+    except GeneratorExit:
+        raise  # a consumer stopped reading a stream; not an upstream failure
+    except BaseException as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        record(endpoint, time.perf_counter() - start, call.error, call.payload, layer)
+
+
+def track_http(url, response=None, error=None, seconds=0.0):
+    """Record one HTTP request, labelled by host and path without its last (symbol/code) segment."""
+    parts = urlparse(url)
+    path = parts.path.rsplit("/", 1)[0] if parts.path.count("/") > 1 else parts.path
+    if error is None and response is not None and response.status_code >= 400:
+        error = f"HTTP {response.status_code}"
+    payload = len(response.content) if response is not None else 0
+    record(f"http:{parts.netloc}{path}", seconds, error, payload)
+
+
+# -----------------------------
+# 🧩 Provider wrappers
+# -----------------------------
+def _wrap_generator(gen, endpoint, start):
+    error = None
+    try:
+        yield from gen
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        record(endpoint, time.perf_counter() - start, error, layer="provider")
+
+
+def instrument(fn, endpoint):
+    """Wrap a provider function; generator results are timed until exhausted."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            record(endpoint, time.perf_counter() - start, type(e).__name__, layer="provider")
+            raise
+        if inspect.isgenerator(result):
+            return _wrap_generator(result, endpoint, start)
+        record(endpoint, time.perf_counter() - start, _error_class(result), layer="provider")
+        return result
+    wrapper.__wrapped__ = fn
+    return wrapper
+
+
+def instrument_module(namespace, skip=()):
+    """Wrap every public function defined in the calling module (pass globals())."""
+    module = namespace["__name__"]
+    for name, obj in list(namespace.items()):
+        if name.startswith("_") or name in skip or not callable(obj) or inspect.isclass(obj):
+            continue
+        if getattr(obj, "__module__", None) == module:
+            namespace[name] = instrument(obj, f"{module}.{name}")
+
+
+def cache_data(endpoint, **cache_kwargs):
+    """st.cache_data that also counts hits/misses against `endpoint`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def miss(*args, **kwargs):
+            _local.missed = True
+            return fn(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(miss)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            _local.missed = False
+            result = cached(*args, **kwargs)
+            record_cache(endpoint, hit=not _local.missed)
+            return result
+
+        call.clear = cached.clear
+        return call
+    return decorator
+
+
+# -----------------------------
+# 🧵 Per-rerun trace
+# -----------------------------
+def start_trace():
+    """Begin a fresh trace for this script run (call at the top of main.py)."""
+    st.session_state[_TRACE_KEY] = {"started": time.perf_counter(), "events": []}
+
+
+def _trace_event(endpoint, layer, seconds, error, payload):
+    if get_script_run_ctx() is None:
+        return  # ticker thread, background sweeps
+    try:
+        trace = st.session_state.get(_TRACE_KEY)
+    except Exception:
+        return
+    if trace is None or len(trace["events"]) >= TRACE_LIMIT:
+        return
+    end = time.perf_counter() - trace["started"]
+    trace["events"].append({
+        "endpoint": endpoint, "layer": layer, "start_ms": round((end - seconds) * 1000, 1),
+        "duration_ms": round(seconds * 1000, 2), "error": error, "bytes": payload,
+        "thread": threading.current_thread().name,
+    })
+
+
+def trace():
+    """Events recorded during this session's latest full rerun (plus fragment reruns since)."""
+    return list((st.session_state.get(_TRACE_KEY) or {}).get("events", []))
+
+
+# -----------------------------
+# 📤 Export
+# -----------------------------
+def quantile(endpoint, q):
+    """Approximate latency quantile (seconds) from the histogram, or None with no data."""
+    stats = _stats.get(endpoint)
+    if stats is None or not stats.calls:
+        return None
+    target, seen = q * stats.calls, 0
+    for bound, count in zip(BUCKETS, stats.buckets):
+        seen += count
+        if seen >= target:
+            return stats.max if bound == float("inf") else min(bound, stats.max)
+    return stats.max
+
+
+def summary():
+    """One row per endpoint for the diagnostics table."""
+    rows = []
+    with _lock:
+        items = sorted(_stats.items())
+    for endpoint, s in items:
+        lookups = s.cache_hits + s.cache_misses
+        rows.append({
+            "endpoint": endpoint, "layer": s.layer, "calls": s.calls,
+            "errors": sum(s.errors.values()),
+            "error_classes": ", ".join(f"{k}×{v}" for k, v in s.errors.most_common()),
+            "mean_ms": round(s.total / s.calls * 1000, 1) if s.calls else None,
+            "p50_ms": _ms(quantile(endpoint, 0.5)), "p95_ms": _ms(quantile(endpoint, 0.95)),
+            "max_ms": round(s.max * 1000, 1),
+            "cache_hit_ratio": round(s.cache_hits / lookups, 3) if lookups else None,
+            "payload_kb": round(s.payload / 1024, 1),
+        })
+    return rows
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _labels(**labels):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def prometheus(prefix="finapp"):
+    """All endpoint metrics in the Prometheus text exposition format."""
+    with _lock:
+        items = sorted(_stats.items())
+        lines = [
+            f"# HELP {prefix}_call_duration_seconds Provider and upstream call latency.",
+            f"# TYPE {prefix}_call_duration_seconds histogram",
+        ]
+        for endpoint, s in items:
+            if not s.calls:
+                continue  # cache-only entries
+            cumulative = 0
+            for bound, count in zip(BUCKETS, s.buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{prefix}_call_duration_seconds_bucket{_labels(endpoint=endpoint, layer=s.layer, le=le)} {cumulative}")
+            lines.append(f"{prefix}_call_duration_seconds_sum{_labels(endpoint=endpoint, layer=s.layer)} {s.total:.6f}")
+            lines.append(f"{prefix}_call_duration_seconds_count{_labels(endpoint=endpoint, layer=s.layer)} {s.calls}")
+
+        lines += [f"# HELP {prefix}_call_errors_total Failed calls by error class.",
+                  f"# TYPE {prefix}_call_errors_total counter"]
+        lines += [f"{prefix}_call_errors_total{_labels(endpoint=e, error=err)} {n}"
+                  for e, s in items for err, n in sorted(s.errors.items())]
+
+        lines += [f"# HELP {prefix}_payload_bytes_total Response bytes received.",
+                  f"# TYPE {prefix}_payload_bytes_total counter"]
+        lines += [f"{prefix}_payload_bytes_total{_labels(endpoint=e)} {s.payload}" for e, s in items if s.payload]
+
+        lines += [f"# HELP {prefix}_cache_lookups_total Cache lookups by result.",
+                  f"# TYPE {prefix}_cache_lookups_total counter"]
+        for e, s in items:
+            if s.cache_hits or s.cache_misses:
+                lines.append(f"{prefix}_cache_lookups_total{_labels(endpoint=e, result='hit')} {s.cache_hits}")
+                lines.append(f"{prefix}_cache_lookups_total{_labels(endpoint=e, result='miss')} {s.cache_misses}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _stats.clear()
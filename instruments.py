@@ -0,0 +1,138 @@
+import datetime
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+# --- Daily dump of kite.instruments(): <data_dir>/instruments/YYYY-MM-DD.npy ---
+INSTRUMENT_DIR = Path(st.secrets.get("data_dir", ".cache")) / "instruments"
+KEY_WIDTH = 48  # bytes for "EXCHANGE:TRADINGSYMBOL"
+FETCH_RETRY_SECONDS = 300  # after a failed download, serve the last dump this long before trying again
+
+DTYPE = np.dtype([
+    ("key", f"S{KEY_WIDTH}"),
+    ("instrument_token", np.int64),
+    ("lot_size", np.int32),
+    ("tick_size", np.float64),
+])
+
+_lock = threading.Lock()
+_current = None      # (dump date, memory-mapped structured array sorted by key), swapped as one
+_fetch_failed_at = 0.0
+
+
+# -----------------------------
+# 🧰 Helpers
+# -----------------------------
+def _today():
+    return datetime.date.today().isoformat()
+
+
+def _latest_dump():
+    dumps = sorted(INSTRUMENT_DIR.glob("*.npy"))
+    return dumps[-1] if dumps else None
+
+
+def _write_dump(rows, path):
+    table = np.array(
+        [(f"{r['exchange']}:{r['tradingsymbol']}".encode()[:KEY_WIDTH],
+          int(r["instrument_token"]), int(r.get("lot_size") or 1), float(r.get("tick_size") or 0.05))
+         for r in rows],
+        dtype=DTYPE,
+    )
+    table.sort(order="key")
+    INSTRUMENT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")  # not *.npy, so a half-written dump is never picked up as the latest
+    with open(tmp, "wb") as f:
+        np.save(f, table)  # a file handle: np.save would append ".npy" to a bare path
+    tmp.replace(path)
+    for old in INSTRUMENT_DIR.glob("*.npy"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def _load(path):
+    global _current
+    _current = (path.stem, np.load(path, mmap_mode="r"))
+
+
+def _table():
+    current = _current
+    return None if current is None else current[1]
+
+
+# -----------------------------
+# 📚 Instrument Master
+# -----------------------------
+def ensure_loaded(fetch=None):
+    """
+    Make today's instrument index available.
+    `fetch()` returns kite.instruments() rows and is only called once per day;
+    without it (not logged in) the most recent dump on disk is used.
+    """
+    global _fetch_failed_at
+    current = _current
+    if current is not None and current[0] == _today():
+        return True
+    with _lock:
+        if _current is not None and _current[0] == _today():
+            return True
+        path = INSTRUMENT_DIR / f"{_today()}.npy"
+        if not path.exists() and fetch is not None and time.time() - _fetch_failed_at >= FETCH_RETRY_SECONDS:
+            try:
+                _write_dump(fetch(), path)
+            except Exception:
+                _fetch_failed_at = time.time()  # don't re-download the whole master on every call
+        if not path.exists():
+            path = _latest_dump()
+        if path is None:
+            return False
+        if _current is None or _current[0] != path.stem:
+            _load(path)
+        return True
+
+
+def is_loaded():
+    return _current is not None
+
+
+def lookup(symbol, exchange="NSE"):
+    """Token, lot size and tick size for EXCHANGE:SYMBOL, or None if unknown (binary search on the sorted keys)."""
+    table = _table()
+    if table is None or not symbol:
+        return None
+    key = f"{exchange}:{symbol.upper().strip()}".encode()[:KEY_WIDTH]
+    keys = table["key"]
+    row = int(np.searchsorted(keys, key, side="left"))
+    if row >= len(keys) or keys[row] != key:
+        return None
+    rec = table[row]
+    return {
+        "exchange": exchange,
+        "tradingsymbol": symbol.upper().strip(),
+        "instrument_token": int(rec["instrument_token"]),
+        "lot_size": int(rec["lot_size"]),
+        "tick_size": float(rec["tick_size"]),
+    }
+
+
+def is_valid(symbol, exchange="NSE"):
+    """True/False once the index is loaded; None when validation isn't possible yet."""
+    if _current is None:
+        return None
+    return lookup(symbol, exchange) is not None
+
+
+def search(prefix, exchange="NSE", limit=10):
+    """Trading symbols on `exchange` starting with `prefix`, via binary search on the sorted keys."""
+    table = _table()
+    if table is None or not prefix:
+        return []
+    lo_key = f"{exchange}:{prefix.upper().strip()}".encode()
+    keys = table["key"]
+    lo = np.searchsorted(keys, lo_key, side="left")
+    hi = np.searchsorted(keys, lo_key + b"\xff", side="left")
+    hi = min(hi, lo + limit)
+    return [k.decode().split(":", 1)[1] for k in keys[lo:hi].tolist()]
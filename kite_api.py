@@ -1,13 +1,64 @@
 import streamlit as st
-from kiteconnect import KiteConnect
-import requests
+import alerts
+import instrumentation
+import kite_registry
+import ticker
+import instruments
+from kite_scheduler import scheduler, PRIORITY
 
 # --- Load from secrets ---
 API_KEY = st.secrets.get("kite_api_key")
 API_SECRET = st.secrets.get("kite_api_secret")
 
-# --- Global Kite instance (initialized later) ---
-kite = None
+
+# -----------------------------
+# 👥 PER-SESSION CLIENTS
+# -----------------------------
+def _client():
+    """This session's authenticated KiteConnect client, or None."""
+    return kite_registry.get()
+
+
+def client_key():
+    """Identity of the logged-in Kite user for this session (None when logged out)."""
+    return kite_registry.user_id()
+
+
+SESSION_EXPIRED = "Kite session expired, please log in again."
+
+
+def _session_expired():
+    """
+    Error dict when this session logged in but the registry no longer holds its client
+    (idle timeout, eviction after a token error, the 06:00 reset). The stale token is
+    cleared so the login prompt shows again. None for sessions that never logged in.
+    """
+    if st.session_state.get("access_token") or st.session_state.get("kite_session_expired"):
+        st.session_state["access_token"] = None
+        st.session_state["kite_session_expired"] = True
+        return {"error": SESSION_EXPIRED}
+    return None
+
+
+# -----------------------------
+# 🚦 RATE-LIMITED CALLS
+# -----------------------------
+def _call(kite, endpoint, method, *args, coalesce=False, priority=None, **kwargs):
+    """Run kite.<method> through the shared scheduler; coalesce=True shares identical concurrent reads."""
+    key = (kite.access_token, method, repr(args), repr(sorted(kwargs.items()))) if coalesce else None
+    try:
+        with instrumentation.track(f"kite.{method}"):
+            return scheduler.call(endpoint, getattr(kite, method), *args, priority=priority, coalesce_key=key, **kwargs)
+    except Exception as e:
+        from kiteconnect.exceptions import TokenException  # already loaded by the client that raised
+        if isinstance(e, TokenException):
+            kite_registry.evict()  # expired or revoked: force a fresh login
+        raise
+
+
+def get_scheduler_stats():
+    """Queue depth, throttle and 429 counters per Kite endpoint class."""
+    return scheduler.stats()
 
 
 # -----------------------------
@@ -15,21 +66,18 @@ kite = None
 # -----------------------------
 def get_login_url():
     """Generate login URL for Kite authentication."""
-    global kite
-    kite = KiteConnect(api_key=API_KEY)
-    return kite.login_url()
+    return kite_registry.get(create=True, authenticated=False).login_url()
 
 
 def generate_access_token(request_token: str):
     """Exchange request token for access token."""
-    global kite
     try:
-        if kite is None:
-            kite = KiteConnect(api_key=API_KEY)
-        data = kite.generate_session(request_token, api_secret=API_SECRET)
+        kite = kite_registry.get(create=True, authenticated=False)
+        data = _call(kite, "default", "generate_session", request_token, api_secret=API_SECRET)
         access_token = data["access_token"]
-        kite.set_access_token(access_token)
+        kite_registry.set_session(access_token, data.get("user_id"))
         st.session_state["access_token"] = access_token
+        st.session_state.pop("kite_session_expired", None)
         return access_token
     except Exception as e:
         return f"Error generating access token: {e}"
@@ -38,26 +86,128 @@ def generate_access_token(request_token: str):
 # -----------------------------
 # 💹 LIVE QUOTES & MARKET DATA
 # -----------------------------
+_alert_keys_registered = False
+
+
+def _register_alert_keys(keys):
+    for key in keys:
+        exchange, symbol = key.split(":", 1)
+        info = instruments.lookup(symbol, exchange)
+        if info and not ticker.is_registered(key):
+            ticker.register(key, info["instrument_token"])
+
+
+def _start_stream(kite):
+    global _alert_keys_registered
+    if kite is not None and kite.access_token:
+        ticker.ensure_started(API_KEY, kite.access_token)
+        if not _alert_keys_registered:
+            # Alerts stored before a restart, for every user, so ticks evaluate them without anyone opening the tab
+            if instruments.ensure_loaded(lambda: _call(kite, "default", "instruments", coalesce=True)):
+                _register_alert_keys(alerts.watched_keys())
+                _alert_keys_registered = True
+
+
+def _track(quotes):
+    """Hand instrument tokens from an ltp() response to the tick stream."""
+    for key, q in quotes.items():
+        if q and q.get("instrument_token") and not ticker.is_registered(key):
+            ticker.register(key, q["instrument_token"], q.get("last_price"))
+
+
+def load_instruments():
+    """Load the daily instrument master (downloading it once per day when logged in)."""
+    kite = _client()
+    return instruments.ensure_loaded((lambda: _call(kite, "default", "instruments", coalesce=True)) if kite else None)
+
+
+def _invalid_symbol(symbol, exchange="NSE"):
+    """Error dict for symbols the instrument master doesn't know; None when valid or unverifiable."""
+    load_instruments()
+    if instruments.is_valid(symbol, exchange) is False:
+        hints = instruments.search(symbol, exchange, limit=5)
+        return {"error": f"Unknown symbol {exchange}:{symbol}" + (f" (did you mean {', '.join(hints)}?)" if hints else "")}
+    return None
+
+
+def track_instruments(rows):
+    """Subscribe holdings/positions rows (which carry instrument_token) to the tick stream."""
+    kite = _client()
+    if kite is None:
+        return
+    _start_stream(kite)
+    for row in rows:
+        symbol = row.get("tradingsymbol")
+        token = row.get("instrument_token")
+        key = f"{row.get('exchange') or 'NSE'}:{symbol}"
+        if symbol and token and not ticker.is_registered(key):
+            ticker.register(key, token, row.get("last_price"))
+
+
 def get_live_quote(symbol):
-    """Fetch live price for a symbol."""
+    """Fetch live price for a symbol (streamed tick if subscribed, else one ltp() call)."""
     try:
+        kite = _client()
         if kite is None:
-            return "Not authenticated"
-        quote = kite.ltp(f"NSE:{symbol}")
+            return (_session_expired() or {"error": "Not authenticated"})["error"]
+        invalid = _invalid_symbol(symbol)
+        if invalid:
+            return invalid["error"]
+        _start_stream(kite)
+        info = instruments.lookup(symbol)
+        if info and not ticker.is_registered(f"NSE:{symbol}"):
+            ticker.register(f"NSE:{symbol}", info["instrument_token"])
+        streamed = ticker.get_price(f"NSE:{symbol}")
+        if streamed is not None:
+            return streamed
+        quote = _call(kite, "quote", "ltp", f"NSE:{symbol}", coalesce=True)
+        _track(quote)
         return quote[f"NSE:{symbol}"]["last_price"]
     except Exception as e:
         return f"Error fetching quote: {e}"
 
 
+LTP_BATCH_SIZE = 1000  # Kite caps ltp() at 1000 instruments per call
+
+
+def get_ltp(symbols, exchange="NSE", strict=False):
+    """Fetch last prices for many symbols; streamed ticks first, one ltp() call for the rest (strict=True raises)."""
+    symbols = [s for s in dict.fromkeys(symbols) if s]
+    kite = _client()
+    if kite is None or not symbols:
+        return {}
+
+    _start_stream(kite)
+    streamed = ticker.get_prices([f"{exchange}:{s}" for s in symbols])
+    prices = {s: streamed[f"{exchange}:{s}"] for s in symbols if f"{exchange}:{s}" in streamed}
+    missing = [s for s in symbols if s not in prices]
+
+    for i in range(0, len(missing), LTP_BATCH_SIZE):
+        batch = missing[i:i + LTP_BATCH_SIZE]
+        try:
+            quotes = _call(kite, "quote", "ltp", [f"{exchange}:{s}" for s in batch], coalesce=True)
+        except Exception:
+            if strict:
+                raise
+            continue
+        _track(quotes)
+        for s in batch:
+            last_price = (quotes.get(f"{exchange}:{s}") or {}).get("last_price")
+            if last_price:
+                prices[s] = float(last_price)
+    return prices
+
+
 # -----------------------------
 # 📊 PORTFOLIO DATA
 # -----------------------------
 def get_holdings():
     """Fetch user holdings."""
     try:
+        kite = _client()
         if kite is None:
-            return []
-        return kite.holdings()
+            return _session_expired() or []
+        return _call(kite, "default", "holdings", coalesce=True, priority=PRIORITY["portfolio"])
     except Exception as e:
         return {"error": str(e)}
 
@@ -65,9 +215,10 @@ def get_holdings():
 def get_positions():
     """Fetch user positions."""
     try:
+        kite = _client()
         if kite is None:
-            return []
-        return kite.positions()["net"]
+            return _session_expired() or []
+        return _call(kite, "default", "positions", coalesce=True, priority=PRIORITY["portfolio"])["net"]
     except Exception as e:
         return {"error": str(e)}
 
@@ -75,9 +226,10 @@ def get_positions():
 def get_funds():
     """Fetch available funds/margins."""
     try:
+        kite = _client()
         if kite is None:
-            return {}
-        return kite.margins()
+            return _session_expired() or {}
+        return _call(kite, "default", "margins", coalesce=True)
     except Exception as e:
         return {"error": str(e)}
 
@@ -85,19 +237,24 @@ def get_funds():
 # -----------------------------
 # 🧾 ORDER PLACEMENT
 # -----------------------------
-def place_order(symbol, qty, order_type, trans_type, price=0):
+def place_order(symbol, qty, order_type, trans_type, price=0, product="CNC", exchange="NSE"):
     """Place a buy/sell order."""
     try:
+        kite = _client()
         if kite is None:
-            return {"error": "Not authenticated"}
-        order_id = kite.place_order(
+            return _session_expired() or {"error": "Not authenticated"}
+        invalid = _invalid_symbol(symbol, exchange)
+        if invalid:
+            return invalid
+        order_id = _call(
+            kite, "order", "place_order",
             variety="regular",
-            exchange="NSE",
+            exchange=exchange,
             tradingsymbol=symbol,
             transaction_type=trans_type,
             quantity=int(qty),
             order_type=order_type,
-            product="CNC",
+            product=product,
             price=float(price),
         )
         return {"success": True, "order_id": order_id}
@@ -105,14 +262,32 @@ def place_order(symbol, qty, order_type, trans_type, price=0):
         return {"error": str(e)}
 
 
+def get_order_statuses(order_ids=None):
+    """Latest order-book row per order id (today's orders), optionally limited to `order_ids`."""
+    try:
+        kite = _client()
+        if kite is None:
+            return _session_expired() or {"error": "Not authenticated"}
+        wanted = set(order_ids or [])
+        orders = _call(kite, "default", "orders", coalesce=True, priority=PRIORITY["portfolio"])
+        return {o["order_id"]: o for o in orders if not wanted or o["order_id"] in wanted}
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # -----------------------------
 # ⏰ GTT ORDERS
 # -----------------------------
 def create_gtt(symbol, trigger_price, qty):
     try:
+        kite = _client()
         if kite is None:
-            return {"error": "Not authenticated"}
-        gtt = kite.place_gtt(
+            return _session_expired() or {"error": "Not authenticated"}
+        invalid = _invalid_symbol(symbol)
+        if invalid:
+            return invalid
+        gtt = _call(
+            kite, "order", "place_gtt",
             trigger_type="single",
             tradingsymbol=symbol,
             exchange="NSE",
@@ -131,9 +306,10 @@ def create_gtt(symbol, trigger_price, qty):
 
 def list_gtt_orders():
     try:
+        kite = _client()
         if kite is None:
-            return []
-        return kite.get_gtts()
+            return _session_expired() or []
+        return _call(kite, "default", "get_gtts", coalesce=True)
     except Exception as e:
         return {"error": str(e)}
 
@@ -141,22 +317,89 @@ def list_gtt_orders():
 # -----------------------------
 # ⚡ ALERTS & MARGINS
 # -----------------------------
-def create_alert(symbol, price, note):
-    """Create a mock alert (not real Kite alert)."""
-    return {"symbol": symbol, "price": price, "note": note}
+def _alert_user():
+    """Alert owner; None once a logged-in session expired, so it never falls into the shared "default" bucket."""
+    user = client_key()
+    if user is None and _session_expired():
+        return None
+    return user or "default"
+
+
+def create_alert(symbol, price, note, direction=None, exchange="NSE"):
+    """Store a price alert and subscribe its instrument so ticks can trigger it."""
+    symbol = (symbol or "").upper().strip()
+    if not symbol:
+        return {"error": "Symbol is required"}
+    invalid = _invalid_symbol(symbol, exchange)
+    if invalid:
+        return invalid
+    key = f"{exchange}:{symbol}"
+    info = instruments.lookup(symbol, exchange)
+    if info and not ticker.is_registered(key):
+        ticker.register(key, info["instrument_token"])
+    _start_stream(_client())
+    user = _alert_user()
+    if user is None:
+        return {"error": SESSION_EXPIRED}
+    last_price = ticker.get_price(key) or get_ltp([symbol], exchange).get(symbol)
+    return alerts.add(user, key, price, note, direction, last_price)
+
+
+def delete_alert(alert_id):
+    user = _alert_user()
+    if user is None:
+        return {"error": SESSION_EXPIRED}
+    return alerts.delete(user, alert_id)
 
 
 def get_alerts():
-    """List alerts from session."""
-    return st.session_state.get("alerts", [])
+    """Active alerts for the logged-in user."""
+    user = _alert_user()
+    return alerts.active(user) if user else []
+
+
+def get_fired_alerts():
+    user = _alert_user()
+    return alerts.fired_log(user) if user else []
+
+
+def pop_alert_notifications():
+    """Alerts that fired since this user was last notified."""
+    user = _alert_user()
+    return alerts.pop_notifications(user) if user else []
+
+
+def check_alerts():
+    """
+    Evaluate this user's alerts against ltp() when the tick stream is down.
+    While streaming, ticks already evaluate every alert as they arrive.
+    """
+    user = _alert_user()
+    if user is None:
+        return []
+    keys = alerts.watched_keys(user)
+    _register_alert_keys(keys)
+    if ticker.is_streaming():
+        return []
+    by_exchange = {}
+    for key in keys:
+        exchange, symbol = key.split(":", 1)
+        by_exchange.setdefault(exchange, []).append(symbol)
+    updates = []
+    for exchange, symbols in by_exchange.items():
+        updates += [(f"{exchange}:{s}", p) for s, p in get_ltp(symbols, exchange).items()]
+    return alerts.evaluate(updates)
 
 
 def get_margin_requirements(symbol, qty):
     """Check margin requirement using latest Kite API format."""
-    global kite
     try:
+        kite = _client()
         if kite is None:
-            return {"error": "Not authenticated"}
+            return _session_expired() or {"error": "Not authenticated"}
+        invalid = _invalid_symbol(symbol)
+        if invalid:
+            return invalid
 
         order_data = [{
             "exchange": "NSE",
@@ -168,7 +411,21 @@ def get_margin_requirements(symbol, qty):
             "quantity": int(qty),
             "price": 0
         }]
-        margin = kite.order_margins(order_data)
+        margin = _call(kite, "default", "order_margins", order_data)
         return margin
     except Exception as e:
         return {"error": f"Error checking margin: {e}"}
+
+
+def get_basket_margins(orders):
+    """Margin for a whole basket in one call: initial, final (after netting) and per-order."""
+    try:
+        kite = _client()
+        if kite is None:
+            return _session_expired() or {"error": "Not authenticated"}
+        return _call(kite, "default", "basket_order_margins", orders, consider_positions=True)
+    except Exception as e:
+        return {"error": f"Error checking basket margin: {e}"}
+
+
+instrumentation.instrument_module(globals(), skip={"client_key", "get_scheduler_stats"})
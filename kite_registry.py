@@ -0,0 +1,115 @@
+import datetime
+import threading
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import http_client
+
+API_KEY = st.secrets.get("kite_api_key")
+KITE_ROOT = st.secrets.get("kite_root")  # None = api.kite.trade; point elsewhere for stand-ins
+
+# Drop clients nobody has used for this long (seconds)
+IDLE_TIMEOUT = float(st.secrets.get("kite_idle_timeout_seconds", 1800))
+SWEEP_INTERVAL = 60
+
+# Kite access tokens are invalidated every morning at 06:00 IST
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+TOKEN_RESET = datetime.time(6, 0, tzinfo=IST)
+
+_lock = threading.Lock()
+_entries = {}    # session key -> {"client", "user_id", "expires_at", "last_used"}
+_last_sweep = 0.0
+
+
+# -----------------------------
+# 🧰 Helpers
+# -----------------------------
+def session_key():
+    """Registry key for the calling Streamlit session (workers inherit it via concurrency.thread_pool)."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "default"
+
+
+def _next_reset(now=None):
+    now = now or datetime.datetime.now(IST)
+    reset = datetime.datetime.combine(now.date(), TOKEN_RESET)
+    if reset <= now:
+        reset += datetime.timedelta(days=1)
+    return reset.timestamp()
+
+
+def _new_client():
+    from kiteconnect import KiteConnect  # deferred: kiteconnect pulls in twisted/autobahn for its ticker
+    # Each client builds its own requests.Session, so every user gets a separate keep-alive pool
+    return KiteConnect(api_key=API_KEY, root=KITE_ROOT, pool=http_client.KITE_POOL, timeout=http_client.KITE_TIMEOUT)
+
+
+def _sweep(now):
+    global _last_sweep
+    if now - _last_sweep < SWEEP_INTERVAL:
+        return
+    _last_sweep = now
+    for key in [k for k, e in _entries.items()
+                if now - e["last_used"] > IDLE_TIMEOUT or (e["expires_at"] and now >= e["expires_at"])]:
+        del _entries[key]
+
+
+# -----------------------------
+# 🗂️ Per-session client registry
+# -----------------------------
+def get(create=False, authenticated=True, key=None):
+    """
+    This session's KiteConnect client. Returns None when there is none (or, with
+    authenticated=True, when it has no live access token). create=True makes a
+    fresh unauthenticated client for the login flow.
+    """
+    key = key or session_key()
+    now = time.time()
+    with _lock:
+        _sweep(now)
+        entry = _entries.get(key)
+        if entry and entry["expires_at"] and now >= entry["expires_at"]:
+            del _entries[key]
+            entry = None
+        if entry is None and create:
+            entry = _entries[key] = {"client": _new_client(), "user_id": None, "expires_at": None, "last_used": now}
+        if entry is None:
+            return None
+        entry["last_used"] = now
+        if authenticated and not entry["expires_at"]:
+            return None
+        return entry["client"]
+
+
+def set_session(access_token, user_id=None, key=None):
+    """Attach a freshly generated access token to this session's client."""
+    key = key or session_key()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = _entries[key] = {"client": _new_client(), "last_used": time.time()}
+        entry["client"].set_access_token(access_token)
+        entry["user_id"] = user_id
+        entry["expires_at"] = _next_reset()
+
+
+def user_id(key=None):
+    """Kite user id for this session (falls back to the access token), or None if not logged in."""
+    with _lock:
+        entry = _entries.get(key or session_key())
+    if not entry or not entry["expires_at"]:
+        return None
+    return entry["user_id"] or entry["client"].access_token
+
+
+def evict(key=None):
+    """Forget this session's client, e.g. after Kite reports the token as invalid."""
+    with _lock:
+        _entries.pop(key or session_key(), None)
+
+
+def active_sessions():
+    with _lock:
+        return sum(1 for e in _entries.values() if e["expires_at"])
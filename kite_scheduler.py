@@ -0,0 +1,149 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+# Kite Connect per-second limits by endpoint class (https://kite.trade/docs/connect/v3/exceptions/#api-rate-limit)
+RATE_LIMITS = {
+    "quote": 1,        # ltp / quote / ohlc
+    "historical": 3,
+    "order": 10,       # place / modify / cancel, GTT
+    "default": 10,     # portfolio, margins, user, instruments, ...
+}
+
+# Lower runs first when several callers wait on the *same* bucket. Each endpoint class has its
+# own bucket, so these defaults order classes only where they share one (e.g. portfolio vs
+# other "default" calls); orders and quotes never compete, they have separate limits anyway.
+PRIORITY = {"order": 0, "portfolio": 1, "default": 2, "quote": 3}
+
+MAX_RETRIES = 2        # re-attempts after a 429 slipped through (e.g. another process on the key)
+RETRY_BASE_DELAY = 0.5
+
+
+def _is_rate_limited(exc):
+    return getattr(exc, "code", None) == 429 or "Too many requests" in str(exc)
+
+
+# -----------------------------
+# 🪣 Token bucket with priority queue
+# -----------------------------
+class _Bucket:
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.cond = threading.Condition()
+        self.waiting = []   # heap of (priority, seq)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority, seq):
+        """Block until this caller is first in line and a token is free; returns True if it had to wait."""
+        entry = (priority, seq)
+        throttled = False
+        with self.cond:
+            heapq.heappush(self.waiting, entry)
+            while True:
+                self._refill()
+                if self.waiting[0] == entry and self.tokens >= 1:
+                    self.tokens -= 1
+                    heapq.heappop(self.waiting)
+                    self.cond.notify_all()
+                    return throttled
+                throttled = True
+                wait = (1 - self.tokens) / self.rate if self.waiting[0] == entry else None
+                self.cond.wait(timeout=wait)
+
+
+# -----------------------------
+# 🚦 Scheduler
+# -----------------------------
+class KiteScheduler:
+    """
+    Front door for every Kite REST call: per-endpoint-class token buckets,
+    priority ordering among callers waiting on the same bucket (not across
+    classes), single-flight coalescing of identical reads, and counters for
+    the diagnostics panel.
+    """
+
+    def __init__(self, limits=RATE_LIMITS):
+        self._buckets = {cls: _Bucket(rate) for cls, rate in limits.items()}
+        self._seq = itertools.count()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {cls: {"calls": 0, "throttled": 0, "coalesced": 0, "rate_limited": 0, "errors": 0}
+                       for cls in limits}
+
+    def call(self, endpoint, fn, *args, priority=None, coalesce_key=None, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` under the `endpoint` class limit.
+        Concurrent calls sharing a `coalesce_key` share one upstream request.
+        """
+        endpoint = endpoint if endpoint in self._buckets else "default"
+        if coalesce_key is None:
+            return self._execute(endpoint, fn, args, kwargs, priority)
+
+        with self._lock:
+            future = self._inflight.get(coalesce_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[coalesce_key] = Future()
+            else:
+                self._stats[endpoint]["coalesced"] += 1  # already under _lock
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._execute(endpoint, fn, args, kwargs, priority)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(coalesce_key, None)
+
+    def _count(self, endpoint, counter):
+        with self._lock:
+            self._stats[endpoint][counter] += 1
+
+    def _execute(self, endpoint, fn, args, kwargs, priority):
+        bucket = self._buckets[endpoint]
+        priority = PRIORITY.get(endpoint, PRIORITY["default"]) if priority is None else priority
+
+        for attempt in range(MAX_RETRIES + 1):
+            if bucket.acquire(priority, next(self._seq)):
+                self._count(endpoint, "throttled")
+            self._count(endpoint, "calls")
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if _is_rate_limited(e) and attempt < MAX_RETRIES:
+                    self._count(endpoint, "rate_limited")
+                    time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random()))
+                    continue
+                self._count(endpoint, "errors")
+                raise
+
+    def stats(self):
+        """Per-class counters plus the current queue depth."""
+        out = {}
+        for cls, bucket in self._buckets.items():
+            with bucket.cond:
+                depth = len(bucket.waiting)
+            with self._lock:
+                counters = dict(self._stats[cls])
+            out[cls] = {**counters, "queue_depth": depth, "limit_per_sec": bucket.rate}
+        return out
+
+
+# One scheduler per process: Kite's limits apply per API key, not per session
+scheduler = KiteScheduler()
@@ -0,0 +1,294 @@
+import time
+
+import streamlit as st
+import pandas as pd
+
+import basket
+import gtt_mirror
+import instruments
+from kite_api import (
+    get_live_quote, get_funds,
+    place_order,
+    create_alert, delete_alert, get_alerts, get_fired_alerts, pop_alert_notifications, check_alerts,
+    get_margin_requirements,
+    load_instruments,
+)
+from prices import get_latest_prices, with_live_prices
+from snapshot import get_snapshot, invalidate as invalidate_snapshot
+
+ALERT_POLL_SECONDS = 10
+GTT_PAGE_SIZE = 25
+
+
+def symbol_hint(symbol):
+    """Show instrument-master suggestions under a partially typed NSE symbol."""
+    if symbol and load_instruments() and not instruments.is_valid(symbol):
+        matches = instruments.search(symbol)
+        st.caption("Suggestions: " + ", ".join(matches) if matches else f"Unknown symbol: {symbol}")
+
+
+# -----------------------------
+# 🧩 Views (each reruns on its own)
+# -----------------------------
+@st.fragment
+def place_order_view():
+    st.subheader("Place Order")
+    symbol = st.text_input("Symbol (e.g., RELIANCE)", key="order_symbol")
+    symbol_hint(symbol)
+    if symbol:
+        st.caption(f"LTP: {get_live_quote(symbol.upper().strip())}")
+    qty = st.number_input("Quantity", 1, 1000, 1, key="order_qty")
+    order_type = st.selectbox("Order Type", ["MARKET", "LIMIT"], key="order_type")
+    trans_type = st.selectbox("Transaction", ["BUY", "SELL"], key="order_side")
+    price = st.number_input("Price (for LIMIT orders)", 0.0, key="order_price")
+    if st.button("Submit Order"):
+        res = place_order(symbol, qty, order_type, trans_type, price)
+        if res.get("success"):
+            invalidate_snapshot()
+        st.write(res)
+
+
+@st.fragment
+def positions_view():
+    st.subheader("Positions & Holdings")
+    if not st.toggle("Load positions, holdings & funds", key="load_positions"):
+        st.caption("Loaded on demand to save broker calls.")
+        return
+    if st.button("Refresh", key="refresh_positions"):
+        invalidate_snapshot()
+    snap = get_snapshot()
+    for err in snap["errors"]:
+        st.error(err)
+    st.write(snap["positions"])
+    st.write(snap["holdings"])
+    st.write(get_funds())
+
+
+@st.fragment
+def gtt_view():
+    st.subheader("Manage GTT Orders")
+    sym = st.text_input("Symbol for GTT", key="gtt_symbol")
+    symbol_hint(sym)
+    trg_price = st.number_input("Trigger Price", 0.0, key="gtt_trigger")
+    qty = st.number_input("Quantity", 1, key="gtt_qty")
+    if st.button("Create GTT"):
+        res = gtt_mirror.create(sym, trg_price, qty)
+        st.write(res)
+    if st.toggle("Show existing GTT orders", key="load_gtts"):
+        gtt_table()
+
+
+def _diff_caption(diff):
+    parts = [f"{len(rows)} {label}" for label, rows in diff.items() if rows]
+    if parts:
+        st.info("Since last sync: " + ", ".join(parts))
+        for label in ("triggered", "cancelled"):
+            if diff[label]:
+                st.caption(f"{label.title()}: " + ", ".join(f"#{r['id']} {r['symbol']}" for r in diff[label]))
+
+
+@st.fragment(run_every=gtt_mirror.SYNC_INTERVAL)
+def gtt_table():
+    """Paginated, filterable view of the local GTT mirror; resyncs on its timer or after a mutation."""
+    force = st.button("Sync now", key="gtt_sync")
+    err = gtt_mirror.sync(force=force)
+    if err:
+        st.error(err["error"])
+    df = gtt_mirror.frame()
+    st.caption(f"{len(df)} GTTs · synced {time.strftime('%H:%M:%S', time.localtime(gtt_mirror.synced_at()))}")
+    _diff_caption(gtt_mirror.last_diff())
+    if df.empty:
+        return
+
+    c1, c2 = st.columns(2)
+    statuses = c1.multiselect("Status", sorted(df["status"].dropna().unique()), key="gtt_status")
+    query = c2.text_input("Symbol contains", key="gtt_query").upper().strip()
+    if statuses:
+        df = df[df["status"].isin(statuses)]
+    if query:
+        df = df[df["symbol"].fillna("").str.contains(query, regex=False)]
+
+    pages = max(1, -(-len(df) // GTT_PAGE_SIZE))
+    page = st.number_input(f"Page (of {pages})", 1, pages, 1, key="gtt_page") if pages > 1 else 1
+    st.dataframe(df.iloc[(page - 1) * GTT_PAGE_SIZE: page * GTT_PAGE_SIZE],
+                 use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def alerts_view():
+    st.subheader("Price Alerts")
+    sym = st.text_input("Alert Symbol", key="alert_symbol")
+    symbol_hint(sym)
+    alert_price = st.number_input("Alert Price", 0.0, key="alert_price")
+    direction = st.selectbox("Trigger when price is", ["Auto", "Above", "Below"], key="alert_direction",
+                             help="Auto picks the side opposite to the current price.")
+    note = st.text_input("Note", "Price Alert", key="alert_note")
+    if st.button("Add Alert"):
+        res = create_alert(sym, alert_price, note, None if direction == "Auto" else direction.lower())
+        if "error" in res:
+            st.error(res["error"])
+        else:
+            st.success(f"Alert set: {res['key']} {res['direction']} {res['threshold']:,.2f}")
+    alert_lists()
+
+
+@st.fragment(run_every=ALERT_POLL_SECONDS)
+def alert_lists():
+    """Active and fired alerts; polls ltp() only when the tick stream is down."""
+    check_alerts()
+    active = get_alerts()
+    if active:
+        st.dataframe(pd.DataFrame(active).drop(columns=["created_at"]), use_container_width=True, hide_index=True)
+        remove = st.selectbox("Remove alert", [a["id"] for a in active], key="alert_remove",
+                              format_func=lambda i: next(f"#{a['id']} {a['key']} {a['direction']} {a['threshold']:,.2f}"
+                                                         for a in active if a["id"] == i))
+        if st.button("Remove"):
+            delete_alert(remove)
+            st.rerun(scope="fragment")
+    else:
+        st.caption("No active alerts.")
+    fired = get_fired_alerts()
+    if fired:
+        st.markdown("**Fired**")
+        log = pd.DataFrame(fired)
+        log["fired_at"] = pd.to_datetime(log["fired_at"], unit="s")
+        st.dataframe(log, use_container_width=True, hide_index=True)
+
+
+@st.fragment(run_every=ALERT_POLL_SECONDS)
+def alert_notifications():
+    """Toast alerts that fired since the last poll; cheap enough to run on every page."""
+    for n in pop_alert_notifications():
+        st.toast(f"🔔 {n['key']} {n['direction']} {n['threshold']:,.2f} (now {n['price']:,.2f}) {n['note'] or ''}")
+
+
+@st.fragment
+def margins_view():
+    st.subheader("Margin Requirement Check")
+    sym = st.text_input("Symbol for Margin Check", "RELIANCE", key="margin_symbol")
+    symbol_hint(sym)
+    qty = st.number_input("Quantity for Margin", 1, key="margin_qty")
+    if st.button("Check Margin"):
+        st.json(get_margin_requirements(sym, qty))
+
+
+def _allocation_legs():
+    """Build legs that move current holdings to the target weights entered in the editor."""
+    targets = st.data_editor(
+        pd.DataFrame({"symbol": pd.Series(dtype="str"), "weight": pd.Series(dtype="float")}),
+        num_rows="dynamic", key="basket_targets", use_container_width=True,
+        column_config={"weight": st.column_config.NumberColumn("Target weight %", min_value=0.0, max_value=100.0)},
+    )
+    capital = st.number_input("Capital (₹, 0 = current holdings value)", 0.0, key="basket_capital")
+    if not st.button("Generate legs"):
+        return None
+
+    targets = {str(r.symbol).upper().strip(): float(r.weight or 0)
+               for r in targets.dropna(subset=["symbol"]).itertuples() if str(r.symbol).strip()}
+    snap = get_snapshot()
+    current = {}
+    for row in snap["holdings"]:
+        current[row["tradingsymbol"]] = current.get(row["tradingsymbol"], 0) + row.get("quantity", 0) + row.get("t1_quantity", 0)
+    prices = with_live_prices(snap["prices"])
+    new = [s for s in targets if not prices.get(s)]
+    if new:
+        prices.update(get_latest_prices(new))
+    legs, errors = basket.legs_from_allocation(current, prices, targets, capital or None)
+    for err in errors:
+        st.warning(err)
+    return legs
+
+
+@st.fragment
+def basket_view():
+    st.subheader("Basket Orders")
+    source = st.radio("Legs from", ["Table / CSV", "Target allocation"], horizontal=True, key="basket_source")
+
+    if source == "Table / CSV":
+        upload = st.file_uploader("CSV with columns " + ", ".join(basket.LEG_COLUMNS), type="csv", key="basket_csv")
+        if upload is not None and st.session_state.get("basket_csv_name") != upload.name:
+            st.session_state["basket_csv_name"] = upload.name
+            st.session_state["basket_legs"] = basket.read_csv(upload.getvalue())
+    else:
+        generated = _allocation_legs()
+        if generated is not None:
+            st.session_state["basket_legs"] = basket.legs_frame(generated)
+
+    table = st.data_editor(
+        st.session_state.get("basket_legs", basket.legs_frame()),
+        num_rows="dynamic", key="basket_editor", use_container_width=True,
+        column_config={
+            "transaction_type": st.column_config.SelectboxColumn(options=["BUY", "SELL"], default="BUY"),
+            "order_type": st.column_config.SelectboxColumn(options=["MARKET", "LIMIT"], default="MARKET"),
+            "product": st.column_config.SelectboxColumn(options=["CNC", "MIS", "NRML"], default="CNC"),
+            "exchange": st.column_config.SelectboxColumn(options=["NSE", "BSE"], default="NSE"),
+        },
+    )
+    legs, errors = basket.normalize_legs(table.to_dict("records"))
+    for err in errors:
+        st.error(err)
+
+    c1, c2 = st.columns(2)
+    if c1.button("Check basket margin", disabled=not legs):
+        margin = basket.check_margins(legs)
+        if "error" in margin:
+            st.error(margin["error"])
+        else:
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Required (₹)", f"{margin['required']:,.2f}")
+            m2.metric("After netting (₹)", f"{margin['final']:,.2f}")
+            m3.metric("Available (₹)", "—" if margin["available"] is None else f"{margin['available']:,.2f}")
+            if margin["sufficient"] is False:
+                st.warning("Available funds do not cover this basket.")
+
+    submitted = c2.button("Submit basket", type="primary", disabled=bool(errors) or not legs)
+    if submitted:
+        # The whole basket is validated in one margin call right before it is placed
+        margin = basket.check_margins(legs)
+        if "error" in margin:
+            st.error(f"Margin check failed, basket not submitted: {margin['error']}")
+            submitted = False
+        elif margin["sufficient"] is False:
+            st.error(f"Available funds do not cover this basket (needs ₹{margin['final']:,.2f}); not submitted.")
+            submitted = False
+        else:
+            st.session_state["basket_results"] = basket.submit(legs)
+            invalidate_snapshot()
+            held = basket.skipped(st.session_state["basket_results"])
+            if held:
+                st.error(f"{len(held)} BUY leg(s) were not placed: {held[0]['message']}. "
+                         "Review the sells, then submit the buys separately.")
+
+    results = st.session_state.get("basket_results")
+    if results:
+        status = st.empty()
+        if submitted:
+            # Follow the fresh basket until every leg is filled or rejected (bounded by track's timeout)
+            for update in basket.track(results):
+                status.dataframe(pd.DataFrame(update), use_container_width=True)
+        elif st.button("Refresh leg status", disabled=basket.is_done(results)):
+            status.dataframe(pd.DataFrame(basket.refresh_status(results)), use_container_width=True)
+        else:
+            status.dataframe(pd.DataFrame(results), use_container_width=True)
+
+
+# --- Kite Tools Page ---
+def show_kite_tools():
+    st.header("🪁 Zerodha Kite Tools")
+    st.info("Manage orders, positions, GTTs, margins, and alerts directly here.")
+    # Tabs: Place Order, Basket, Positions, GTT, Alerts, Margins
+    tab1, tab_basket, tab2, tab3, tab4, tab5 = st.tabs(
+        ["Place Order", "Basket", "Positions", "GTT Orders", "Alerts", "Margins"])
+
+    with tab1:
+        place_order_view()
+    with tab_basket:
+        basket_view()
+    with tab2:
+        positions_view()
+    with tab3:
+        gtt_view()
+    with tab4:
+        alerts_view()
+    with tab5:
+        margins_view()
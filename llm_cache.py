@@ -0,0 +1,105 @@
+import hashlib
+import json
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+import instrumentation
+
+# --- Disk-backed response cache shared by every session on this host ---
+DB_PATH = Path(st.secrets.get("data_dir", ".cache")) / "llm_cache.sqlite"
+MAX_ENTRIES = int(st.secrets.get("llm_cache_entries", 500))
+INSIGHTS_TTL = 6 * 3600
+CHAT_TTL = 3600
+PRICE_BUCKET = 0.02  # prices within ~2% of each other share a fingerprint
+
+_initialized = False
+
+
+# -----------------------------
+# 🗄️ SQLite backend
+# -----------------------------
+def _connect():
+    global _initialized
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=5)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, value TEXT NOT NULL,
+            expires_at REAL NOT NULL, last_access REAL NOT NULL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        _initialized = True
+    return conn
+
+
+@contextmanager
+def _db():
+    conn = _connect()
+    try:
+        with conn:  # commit/rollback
+            yield conn
+    finally:
+        conn.close()
+
+
+def get(key):
+    """Cached response for `key`, or None if missing/expired. Refreshes its LRU position."""
+    now = time.time()
+    with _db() as conn:
+        row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None and row[1] < now:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            row = None
+        instrumentation.record_cache("llm_cache", hit=row is not None)
+        if row is None:
+            return None
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+
+def put(key, value, ttl):
+    """Store `value` for `ttl` seconds, evicting expired then least-recently-used rows past MAX_ENTRIES."""
+    now = time.time()
+    with _db() as conn:
+        conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now + ttl, now))
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        conn.execute("""DELETE FROM responses WHERE key IN (
+            SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)""", (MAX_ENTRIES,))
+
+
+def invalidate(key):
+    with _db() as conn:
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+
+# -----------------------------
+# 🔑 Stable cache keys
+# -----------------------------
+def fingerprint(*parts):
+    """sha256 over JSON-serialized parts (sorted keys, so dict order doesn't matter)."""
+    blob = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _price_bucket(price):
+    if not price or price <= 0:
+        return 0
+    return round(math.log(price) / math.log1p(PRICE_BUCKET))
+
+
+def portfolio_fingerprint(rows):
+    """
+    Key a portfolio by symbol, quantity, cost basis and bucketed price so small ticks
+    don't bust the cache but accounts with different entry prices (and P&L) never share it.
+    """
+    normalized = sorted(
+        (str(r.get("symbol")), float(r.get("quantity") or 0), round(float(r.get("average_price") or 0), 2),
+         _price_bucket(r.get("last_price") or 0))
+        for r in rows
+    )
+    return fingerprint(normalized)
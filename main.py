@@ -1,20 +1,25 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-
-from kite_api import (
-    get_live_quote, get_login_url, generate_access_token,
-    get_positions, get_holdings, get_funds,
-    place_order, create_gtt, list_gtt_orders,
-    create_alert, get_alerts, get_margin_requirements
-)
-from fmp_api import get_historical_data, get_company_info
-from fmp_api import get_latest_price
-from mf_api import get_mutual_fund_data
-from portfolio import show_portfolio_summary
-from ai_agent import ai_portfolio_insights, ai_chat
+
+import instrumentation
+
+# Section modules (and their pandas / plotly / kiteconnect / Gemini dependencies)
+# are imported inside the branch that needs them, so a cold start only pays for
+# the page actually opened.
 
 st.set_page_config(page_title="Smart Financial Assistant", layout="wide")
+instrumentation.start_trace()
+
+
+def timing_caption(timing):
+    """Show time-to-first-token for the generation that just finished."""
+    if not timing:
+        return
+    if timing["cached"]:
+        st.caption("Served from cache")
+    elif timing["ttft"] is not None:
+        st.caption(f"First token in {timing['ttft']:.2f}s · complete in {timing['total']:.2f}s")
+
+
 st.title("Financial Assistant Dashboard")
 
 # -----------------------------
@@ -26,10 +31,12 @@ if "access_token" not in st.session_state:
 
 st.sidebar.markdown("Click login and paste request token:")
 if st.sidebar.button("Open Kite Login URL"):
+    from kite_api import get_login_url
     st.write(f"[Click here to login]({get_login_url()})")
 
 request_token_input = st.sidebar.text_input("Paste Request Token here:")
 if st.sidebar.button("Generate Access Token") and request_token_input:
+    from kite_api import generate_access_token
     token = generate_access_token(request_token_input)
     if "Error" in token:
         st.error(token)
@@ -37,6 +44,11 @@ if st.sidebar.button("Generate Access Token") and request_token_input:
         st.session_state["access_token"] = token
         st.success("Access Token generated successfully!")
 
+if st.session_state["access_token"]:
+    from kite_tools import alert_notifications
+    with st.sidebar:
+        alert_notifications()
+
 # -----------------------------
 # Sidebar Menu
 # -----------------------------
@@ -52,25 +64,48 @@ if menu == "Stock Data":
     symbol = st.text_input("Enter NSE Symbol (e.g., RELIANCE)", "RELIANCE")
 
     if st.button("Fetch Data"):
-        symbol_ns = symbol.upper().strip() + ".NS"
-
-        # Live Price
-        live = get_latest_price(symbol_ns)
-        st.metric(label=f"Live Price of {symbol}", value=f"₹{live}")
-
-        # Company Info
-        info = get_company_info(symbol_ns)
-        st.subheader("Company Information")
-        st.write(info)
-
-        # Historical Data
-        data = get_historical_data(symbol_ns, period="6mo")
-        if data.empty:
-            st.warning("No historical data found for this symbol.")
-        else:
-            st.subheader("Price Trend")
-            fig = px.line(data, x=data.index, y="close", title=f"{symbol} - Last 6 Months")
-            st.plotly_chart(fig, use_container_width=True)
+        from concurrent.futures import as_completed
+        import plotly.express as px
+        from concurrency import thread_pool
+        from market_data import get_company_info, get_history, get_latest_price
+
+        symbol = symbol.upper().strip()
+
+        # Fixed slots keep the section order while results arrive out of order
+        price_slot, info_slot, chart_slot = st.empty(), st.container(), st.container()
+
+        with thread_pool(3) as pool:
+            futures = {
+                pool.submit(get_latest_price, symbol): "price",
+                pool.submit(get_company_info, symbol): "info",
+                pool.submit(get_history, symbol, "6mo"): "history",
+            }
+            for future in as_completed(futures):
+                section = futures[future]
+                result = future.result()
+
+                # Live Price
+                if section == "price":
+                    price_slot.metric(label=f"Live Price of {symbol}", value=f"₹{result}")
+
+                # Company Info
+                elif section == "info":
+                    with info_slot:
+                        st.subheader("Company Information")
+                        if "error" in result:
+                            st.warning(f"Company information unavailable: {result['error']}")
+                        else:
+                            st.write(result)
+
+                # Historical Data
+                elif section == "history":
+                    with chart_slot:
+                        if result.empty:
+                            st.warning("No historical data found for this symbol.")
+                        else:
+                            st.subheader("Price Trend")
+                            fig = px.line(result, x=result.index, y="close", title=f"{symbol} - Last 6 Months")
+                            st.plotly_chart(fig, use_container_width=True)
 
 
 
@@ -78,6 +113,9 @@ if menu == "Stock Data":
 # MUTUAL FUNDS
 # -----------------------------
 elif menu == "Mutual Funds":
+    import pandas as pd
+    from mf_api import get_mutual_fund_data, get_nav_matrix
+
     st.header("💼 Mutual Fund Insights")
     popular_funds = {
         "Quant Small Cap Fund": "120828",
@@ -87,117 +125,121 @@ elif menu == "Mutual Funds":
         "HDFC Mid-Cap Opportunities Fund": "119551"
     }
 
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        fund_name = st.selectbox("Choose from popular funds:", list(popular_funds.keys()))
-    with col2:
-        scheme_code = st.text_input("Or enter a mutual fund code manually:", "")
-
-    if not scheme_code:
-        scheme_code = popular_funds[fund_name]
-
-    if st.button("Fetch Fund"):
-        mf = get_mutual_fund_data(scheme_code)
-        if "error" in mf:
-            st.error(mf["error"])
-        else:
-            st.markdown(f"""
-            ### {mf['fund_name']}
-            **Fund House:** {mf['fund_house']}  
-            **Category:** {mf['category']}  
-            **Rating:** {mf['rating']}  
-            **Risk:** {mf['risk']}  
-            **Expense Ratio:** {mf['expense_ratio']}  
-            **AUM:** {mf['aum']}  
-            **Dividend Info:** {mf['dividend_info']}  
-            """)
-            if not mf["nav_df"].empty:
-                st.subheader("NAV Trend (Last 30 Days)")
-                st.line_chart(mf["nav_df"].set_index("date")["nav"])
+    mode = st.radio("Mode", ["Single Fund", "Compare Funds"], horizontal=True)
+
+    if mode == "Compare Funds":
+        picked = st.multiselect("Popular funds to compare:", list(popular_funds.keys()))
+        extra = st.text_area("More scheme codes (comma or newline separated):", "")
+        codes = [popular_funds[name] for name in picked] + extra.replace("\n", ",").split(",")
+
+        if st.button("Compare Funds"):
+            import plotly.express as px
+            from mf_analytics import compare_funds
+
+            matrix, names, errors = get_nav_matrix(codes)
+            for code, err in errors.items():
+                st.warning(f"{code}: {err}")
+
+            if matrix.shape[1] < 2:
+                st.info("Pick at least two schemes with NAV history to compare.")
+            else:
+                labels = [names.get(code, code) for code in matrix.columns]
+                cmp = compare_funds(matrix.index.to_numpy(), matrix.to_numpy())
+
+                st.subheader("Trailing Returns")
+                st.dataframe(pd.DataFrame(cmp["trailing"], index=labels).style.format("{:.2%}", na_rep="N/A"),
+                             use_container_width=True)
+
+                st.subheader("Relative Performance (rebased to 100)")
+                st.line_chart(pd.DataFrame(cmp["rebased"], index=cmp["rebased_dates"], columns=labels))
+
+                st.subheader("Daily Return Correlation")
+                st.plotly_chart(px.imshow(cmp["correlation"], x=labels, y=labels, zmin=-1, zmax=1,
+                                          color_continuous_scale="RdBu", text_auto=".2f"),
+                                use_container_width=True)
+
+    else:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            fund_name = st.selectbox("Choose from popular funds:", list(popular_funds.keys()))
+        with col2:
+            scheme_code = st.text_input("Or enter a mutual fund code manually:", "")
+
+        if not scheme_code:
+            scheme_code = popular_funds[fund_name]
+
+        if st.button("Fetch Fund"):
+            mf = get_mutual_fund_data(scheme_code)
+            if "error" in mf:
+                st.error(mf["error"])
+            else:
+                st.markdown(f"""
+                ### {mf['fund_name']}
+                **Fund House:** {mf['fund_house']}  
+                **Category:** {mf['category']}  
+                **Rating:** {mf['rating']}  
+                **Risk:** {mf['risk']}  
+                **Expense Ratio:** {mf['expense_ratio']}  
+                **AUM:** {mf['aum']}  
+                **Dividend Info:** {mf['dividend_info']}  
+                """)
+                metrics = mf["metrics"]
+                if metrics:
+                    st.subheader("Performance")
+                    cols = st.columns(4)
+                    for i, (label, value) in enumerate(metrics.items()):
+                        shown = "N/A" if pd.isna(value) else (f"{value:.2f}" if label.startswith("Sharpe") else f"{value:.2%}")
+                        cols[i % 4].metric(label, shown)
+
+                if not mf["nav_df"].empty:
+                    st.subheader("NAV Trend")
+                    st.line_chart(mf["nav_df"].set_index("date")["nav"])
 
 # -----------------------------
 # PORTFOLIO
 # -----------------------------
 elif menu == "Portfolio":
+    from portfolio import show_portfolio_summary
     show_portfolio_summary()
 
 # -----------------------------
 # AI INSIGHTS
 # -----------------------------
 elif menu == "AI Insights":
+    from ai_agent import ai_portfolio_insights, last_timing
     st.header("AI Portfolio Insights")
+    force_refresh = st.checkbox("Force refresh (skip cached insights)")
     if st.button("Get Insights"):
-        insights = ai_portfolio_insights()
-        st.write(insights)
+        st.write_stream(ai_portfolio_insights(force_refresh=force_refresh, stream=True))
+        timing_caption(last_timing("insights"))
 
 # -----------------------------
 # CHAT
 # -----------------------------
 elif menu == "Chat":
+    from ai_agent import ai_chat, last_timing
     st.header("Chat with Your Financial Agent")
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
 
     user_query = st.text_input("Ask me anything about your portfolio:")
+    force_refresh = st.checkbox("Force a fresh answer")
     if st.button("Send") and user_query.strip():
-        response = ai_chat(user_query)
         st.markdown(f"**You:** {user_query}")
-        st.markdown(f"**Assistant:** {response}")
+        st.markdown("**Assistant:**")
+        st.write_stream(ai_chat(user_query, force_refresh=force_refresh, stream=True))
+        timing_caption(last_timing("chat"))
 
 # -----------------------------
 # KITE TOOLS
 # -----------------------------
 elif menu == "Kite Tools":
-    st.header("🪁 Zerodha Kite Tools")
-    st.info("Manage orders, positions, GTTs, margins, and alerts directly here.")
-    # Tabs: Place Order, Positions, GTT, Alerts, Margins
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Place Order", "Positions", "GTT Orders", "Alerts", "Margins"])
-
-    # --- Place Order
-    with tab1:
-        st.subheader("Place Order")
-        symbol = st.text_input("Symbol (e.g., RELIANCE)")
-        qty = st.number_input("Quantity", 1, 1000, 1)
-        order_type = st.selectbox("Order Type", ["MARKET", "LIMIT"])
-        trans_type = st.selectbox("Transaction", ["BUY", "SELL"])
-        price = st.number_input("Price (for LIMIT orders)", 0.0)
-        if st.button("Submit Order"):
-            res = place_order(symbol, qty, order_type, trans_type, price)
-            st.write(res)
-
-    # --- Positions & Holdings
-    with tab2:
-        st.subheader("Positions & Holdings")
-        st.write(get_positions())
-        st.write(get_holdings())
-        st.write(get_funds())
-
-    # --- GTT Orders
-    with tab3:
-        st.subheader("Manage GTT Orders")
-        sym = st.text_input("Symbol for GTT")
-        trg_price = st.number_input("Trigger Price", 0.0)
-        qty = st.number_input("Quantity", 1)
-        if st.button("Create GTT"):
-            res = create_gtt(sym, trg_price, qty)
-            st.write(res)
-        st.write("Existing GTT Orders:")
-        st.json(list_gtt_orders())
-
-    # --- Alerts
-    with tab4:
-        st.subheader("Price Alerts")
-        sym = st.text_input("Alert Symbol")
-        alert_price = st.number_input("Alert Price", 0.0)
-        note = st.text_input("Note", "Price Alert")
-        if st.button("Add Alert"):
-            st.success(create_alert(sym, alert_price, note))
-        st.write(get_alerts())
-
-    # --- Margins
-    with tab5:
-        st.subheader("Margin Requirement Check")
-        sym = st.text_input("Symbol for Margin Check", "RELIANCE")
-        qty = st.number_input("Quantity for Margin", 1)
-        res = get_margin_requirements(sym, qty)
-        st.json(res)
+    from kite_tools import show_kite_tools
+    show_kite_tools()
+
+# -----------------------------
+# DIAGNOSTICS (hidden: ?diagnostics=1)
+# -----------------------------
+if st.query_params.get("diagnostics") == "1" or st.secrets.get("show_diagnostics", False):
+    from diagnostics import show_diagnostics
+    show_diagnostics()
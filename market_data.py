@@ -0,0 +1,290 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import pandas as pd
+import streamlit as st
+
+import fmp_api
+import instrumentation
+import kite_api
+import price_store
+import yfinance_api
+from concurrency import thread_pool
+
+# Provider order for history and company info; the first is the primary, the rest are hedges
+PROVIDERS = list(st.secrets.get("market_data_providers", ["fmp", "yfinance"]))
+
+HEDGE_QUANTILE = 0.95   # fire the next provider once the current one is slower than its own p95
+HEDGE_DEFAULT = float(st.secrets.get("hedge_delay_seconds", 1.0))  # before a provider has any latency history
+HEDGE_MIN, HEDGE_MAX = 0.05, 5.0
+
+BREAKER_FAILURES = int(st.secrets.get("breaker_failures", 5))         # consecutive failures that open a breaker
+BREAKER_RESET = float(st.secrets.get("breaker_reset_seconds", 30.0))  # seconds before one probe call is let through
+
+SUFFIXES = {"NSE": ".NS", "BSE": ".BO"}
+COLUMNS = ["open", "high", "low", "close", "adjClose", "volume"]
+_COLUMN_ALIASES = {"adj close": "adjClose", "adjclose": "adjClose", "adj_close": "adjClose"}
+_INFO_FIELDS = ("Sector", "Industry", "Market Cap", "P/E Ratio", "52 Week High", "52 Week Low")
+
+
+class ProviderError(Exception):
+    """Every provider failed or was skipped by its circuit breaker."""
+
+
+# -----------------------------
+# 🔤 Symbols & Columns
+# -----------------------------
+def parse_symbol(symbol, exchange="NSE"):
+    """RELIANCE / RELIANCE.NS / NSE:RELIANCE -> ("RELIANCE", "NSE"); indices like ^NSEI pass through."""
+    symbol = symbol.strip().upper()
+    if ":" in symbol:
+        exchange, symbol = symbol.split(":", 1)
+    for exch, suffix in SUFFIXES.items():
+        if symbol.endswith(suffix):
+            return symbol[: -len(suffix)], exch
+    return symbol, exchange
+
+
+def provider_symbol(provider, symbol, exchange="NSE"):
+    """The symbol as `provider` expects it; None when the provider can't quote it (Kite and indices)."""
+    base, exchange = parse_symbol(symbol, exchange)
+    listed = not base.startswith("^") and "." not in base
+    if provider == "kite":
+        return base if listed else None
+    return base + SUFFIXES.get(exchange, ".NS") if listed else base
+
+
+def normalize_history(df):
+    """Lower-case OHLC columns (+ adjClose) on a tz-naive daily index named `date`, oldest first."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    df = df.rename(columns={c: _COLUMN_ALIASES.get(str(c).lower(), str(c).lower()) for c in df.columns})
+    if "date" in df.columns:
+        df = df.set_index("date")
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize().rename("date")
+    return df[[c for c in COLUMNS if c in df.columns]].sort_index()
+
+
+def _has_info(info):
+    return isinstance(info, dict) and any(info.get(f) is not None for f in _INFO_FIELDS)
+
+
+_USABLE = {
+    "history": lambda df: df is not None and not df.empty,
+    "update": lambda df: df is not None,  # an incremental range with no bars (provider lag, holidays) is a normal answer
+    "price": lambda price: bool(price),
+    "info": _has_info,
+}
+
+
+# -----------------------------
+# 🔌 Circuit Breakers
+# -----------------------------
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive errors; open -> half-open after
+    `reset_timeout` seconds, letting one probe through; the probe's outcome closes
+    or re-opens it. While open, the provider is skipped without a call.
+    """
+
+    def __init__(self, name, failures=BREAKER_FAILURES, reset_timeout=BREAKER_RESET):
+        self.name = name
+        self.max_failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state, self._probing = "half-open", False
+            if self.state == "closed":
+                return True
+            if self.state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self._probing = "closed", 0, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.max_failures:
+                self.state, self.opened_at, self._probing = "open", time.monotonic(), False
+
+
+_breakers = {p: CircuitBreaker(p) for p in ("fmp", "yfinance")}  # shared upstreams
+_kite_breakers = {}  # Kite user -> CircuitBreaker; one account's session trouble shouldn't skip Kite for all
+_breakers_lock = threading.Lock()
+_wins = Counter()     # provider -> results served
+_hedges = Counter()   # provider -> times fired as a hedge
+_skips = Counter()    # provider -> calls skipped by an open breaker
+
+
+def _breaker(provider):
+    if provider != "kite":
+        return _breakers[provider]
+    user = kite_api.client_key() or "default"
+    with _breakers_lock:
+        return _kite_breakers.setdefault(user, CircuitBreaker(f"kite:{user}"))
+
+
+def breaker_states():
+    """One row per provider for the diagnostics panel (Kite: this session's user)."""
+    rows = []
+    for name, b in [*_breakers.items(), ("kite", _breaker("kite"))]:
+        rows.append({
+            "provider": name, "state": b.state, "consecutive_failures": b.failures,
+            "open_for_s": round(time.monotonic() - b.opened_at, 1) if b.state == "open" else None,
+            "served": _wins[name], "hedged": _hedges[name], "skipped": _skips[name],
+        })
+    return rows
+
+
+# -----------------------------
+# 🏁 Hedged Requests
+# -----------------------------
+def _hedge_delay(kind, provider):
+    p95 = instrumentation.quantile(f"market_data.{kind}.{provider}", HEDGE_QUANTILE)
+    return min(max(p95 if p95 is not None else HEDGE_DEFAULT, HEDGE_MIN), HEDGE_MAX)
+
+
+def _attempt(kind, provider, breaker, fn):
+    try:
+        with instrumentation.track(f"market_data.{kind}.{provider}", layer="provider"):
+            result = fn()
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
+
+
+def _hedged(kind, calls):
+    """
+    Run `calls` ([(provider, fn)], primary first) as hedged requests: when the
+    in-flight provider hasn't answered within its p95 latency, the next one is
+    fired too and the first usable result wins. A failure or empty answer moves
+    straight on to the next provider. Providers with an open breaker are skipped.
+    Returns (result, provider); raises ProviderError if nobody answered.
+    """
+    queue = list(calls)
+    usable = _USABLE[kind]
+    pool = thread_pool(len(queue) or 1)
+    pending, errors, fallback = {}, {}, None
+
+    def launch(hedge=False):
+        # Ask each breaker only when its provider is actually about to run, so a granted probe is never left unused
+        while queue:
+            provider, fn = queue.pop(0)
+            breaker = _breaker(provider)
+            if not breaker.allow():
+                _skips[provider] += 1
+                continue
+            pending[pool.submit(_attempt, kind, provider, breaker, fn)] = provider
+            if hedge:
+                _hedges[provider] += 1
+            return provider
+        return None
+
+    latest = launch()
+    if latest is None:
+        pool.shutdown(wait=False)
+        raise ProviderError(f"{kind}: all providers unavailable (circuit open)")
+    try:
+        while pending:
+            timeout = _hedge_delay(kind, latest) if queue else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                latest = launch(hedge=True) or latest
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors[provider] = f"{type(e).__name__}: {e}"
+                    continue
+                if usable(result):
+                    _wins[provider] += 1
+                    return result, provider
+                if fallback is None:
+                    fallback = (result, provider)
+            if not pending and queue:
+                latest = launch() or latest
+    finally:
+        pool.shutdown(wait=False)  # a slower loser finishes (and reports to its breaker) in the background
+
+    if fallback is not None:
+        return fallback
+    raise ProviderError(f"{kind}: " + ("; ".join(f"{p}: {e}" for p, e in errors.items())
+                                      or "all providers unavailable (circuit open)"))
+
+
+# -----------------------------
+# 📈 Public API
+# -----------------------------
+def get_history(symbol="RELIANCE", period="6mo", exchange="NSE"):
+    """Daily OHLC for `symbol` from the local price store, topped up with a hedged FMP/yfinance fetch."""
+    key = provider_symbol("fmp", symbol, exchange)
+
+    def fetch(_, start):
+        calls = {
+            "fmp": lambda: normalize_history(fmp_api.fetch_history(key, start)),
+            "yfinance": lambda: normalize_history(
+                yfinance_api.fetch_history(provider_symbol("yfinance", symbol, exchange), start)),
+        }
+        kind = "history" if start is None else "update"
+        return _hedged(kind, [(p, calls[p]) for p in PROVIDERS if p in calls])[0]
+
+    try:
+        price_store.sync(key, fetch)
+    except Exception:
+        pass  # serve whatever is already on disk
+    return normalize_history(price_store.read(key, period))
+
+
+def get_latest_price(symbol, exchange="NSE"):
+    """Last traded price: Kite when logged in, hedged against FMP/yfinance quotes. 0.0 when nobody has one."""
+    base, exchange = parse_symbol(symbol, exchange)
+    kite_symbol = provider_symbol("kite", base, exchange)
+    calls = {
+        "kite": lambda: kite_api.get_ltp([kite_symbol], exchange, strict=True).get(kite_symbol, 0.0),
+        "fmp": lambda: float(fmp_api.get_company_quote(provider_symbol("fmp", base, exchange), strict=True)
+                             .get("price") or 0.0),
+        "yfinance": lambda: float(yfinance_api.get_latest_price(provider_symbol("yfinance", base, exchange)) or 0.0),
+    }
+    order = (["kite"] if kite_symbol and kite_api.client_key() else []) + PROVIDERS
+    try:
+        price, _ = _hedged("price", [(p, calls[p]) for p in dict.fromkeys(order) if p in calls])
+    except ProviderError:
+        return 0.0
+    return round(float(price or 0.0), 2)
+
+
+def get_company_info(symbol, exchange="NSE"):
+    """Company profile/valuation dict (fmp_api.format_company_info keys + Source), or {"error": ...}."""
+    calls = {
+        "fmp": lambda: fmp_api.get_company_info(provider_symbol("fmp", symbol, exchange), strict=True),
+        "yfinance": lambda: yfinance_api.get_company_info(provider_symbol("yfinance", symbol, exchange)),
+    }
+    try:
+        info, source = _hedged("info", [(p, calls[p]) for p in PROVIDERS if p in calls])
+    except ProviderError as e:
+        return {"error": str(e)}
+    return {**info, "Source": source}
+
+
+instrumentation.instrument_module(globals(), skip={"parse_symbol", "provider_symbol", "normalize_history",
+                                                   "breaker_states"})
@@ -0,0 +1,135 @@
+import numpy as np
+import streamlit as st
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = float(st.secrets.get("risk_free_rate", 0.065))  # annual, used for Sharpe
+
+
+# -----------------------------
+# 🧰 Helpers
+# -----------------------------
+def _as_arrays(dates, navs):
+    """Ascending datetime64[D] dates and float64 NAVs, NaNs dropped."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    navs = np.asarray(navs, dtype=np.float64)
+    mask = ~np.isnan(navs)
+    return dates[mask], navs[mask]
+
+
+def _years_between(start, end):
+    return (end - start).astype("timedelta64[D]").astype(np.float64) / 365.25
+
+
+# -----------------------------
+# 📈 Return Analytics
+# -----------------------------
+def cagr(dates, navs, years):
+    """Annualized return over the trailing `years`; NaN if history is too short."""
+    dates, navs = _as_arrays(dates, navs)
+    if len(navs) < 2:
+        return np.nan
+    start = dates[-1] - np.timedelta64(int(round(years * 365.25)), "D")
+    i = np.searchsorted(dates, start, side="left")
+    if i >= len(dates) - 1 or (i == 0 and dates[0] > start):
+        return np.nan
+    return (navs[-1] / navs[i]) ** (1.0 / _years_between(dates[i], dates[-1])) - 1.0
+
+
+def rolling_returns(dates, navs, years=1):
+    """Annualized `years`-window return ending on every date that has a full window."""
+    dates, navs = _as_arrays(dates, navs)
+    window = np.timedelta64(int(round(years * 365.25)), "D")
+    start_idx = np.searchsorted(dates, dates - window, side="left")
+    valid = (dates - window >= dates[0]) & (start_idx < np.arange(len(dates)))
+    ends, starts = np.nonzero(valid)[0], start_idx[valid]
+    span = _years_between(dates[starts], dates[ends])
+    returns = (navs[ends] / navs[starts]) ** (1.0 / span) - 1.0
+    return dates[ends], returns
+
+
+def max_drawdown(navs):
+    """Largest peak-to-trough fall as a positive fraction."""
+    navs = np.asarray(navs, dtype=np.float64)
+    navs = navs[~np.isnan(navs)]
+    if len(navs) == 0:
+        return np.nan
+    return float(np.max(1.0 - navs / np.maximum.accumulate(navs)))
+
+
+def volatility(navs):
+    """Annualized standard deviation of daily log returns."""
+    navs = np.asarray(navs, dtype=np.float64)
+    log_ret = np.diff(np.log(navs[~np.isnan(navs)]))
+    if len(log_ret) < 2:
+        return np.nan
+    return float(log_ret.std(ddof=1) * np.sqrt(TRADING_DAYS))
+
+
+def sharpe(dates, navs, years=3, risk_free=RISK_FREE_RATE):
+    """Trailing-`years` CAGR in excess of the risk-free rate per unit of volatility."""
+    dates, navs = _as_arrays(dates, navs)
+    start = dates[-1] - np.timedelta64(int(round(years * 365.25)), "D")
+    window = navs[dates >= start]
+    vol = volatility(window)
+    ret = cagr(dates, navs, years)
+    if not vol or np.isnan(vol) or np.isnan(ret):
+        return np.nan
+    return (ret - risk_free) / vol
+
+
+def fund_metrics(dates, navs):
+    """All headline metrics for one NAV series, as plain floats (NaN when unavailable)."""
+    dates, navs = _as_arrays(dates, navs)
+    if len(navs) < 2:
+        return {}
+    _, roll_1y = rolling_returns(dates, navs, 1)
+    return {
+        "CAGR 1Y": cagr(dates, navs, 1),
+        "CAGR 3Y": cagr(dates, navs, 3),
+        "CAGR 5Y": cagr(dates, navs, 5),
+        "Rolling 1Y (median)": float(np.median(roll_1y)) if len(roll_1y) else np.nan,
+        "Rolling 1Y (worst)": float(roll_1y.min()) if len(roll_1y) else np.nan,
+        "Max Drawdown": max_drawdown(navs),
+        "Volatility (ann.)": volatility(navs),
+        "Sharpe 3Y": sharpe(dates, navs, 3),
+    }
+
+
+# -----------------------------
+# 🔀 Multi-scheme Comparison
+# -----------------------------
+def compare_funds(dates, matrix):
+    """
+    One vectorized pass over an aligned dates x schemes NAV matrix.
+    Returns the daily-return correlation matrix, NAVs rebased to 100 at the first
+    date every scheme has data, and trailing 1/3/5-year CAGR per scheme.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    values = np.asarray(matrix, dtype=np.float64)
+
+    complete = ~np.isnan(values).any(axis=1)
+    first = int(np.argmax(complete)) if complete.any() else len(dates)
+    rebased = values[first:] / values[first] * 100.0 if complete.any() else values[:0]
+
+    common = values[complete]
+    if len(common) > 2:
+        correlation = np.corrcoef(np.diff(np.log(common), axis=0), rowvar=False)
+    else:
+        correlation = np.full((values.shape[1], values.shape[1]), np.nan)
+
+    trailing = {}
+    for years in (1, 3, 5):
+        start = dates[-1] - np.timedelta64(int(round(years * 365.25)), "D")
+        i = np.searchsorted(dates, start, side="left")
+        if i >= len(dates) - 1 or dates[0] > start:
+            trailing[f"CAGR {years}Y"] = np.full(values.shape[1], np.nan)
+            continue
+        span = _years_between(dates[i], dates[-1])
+        trailing[f"CAGR {years}Y"] = (values[-1] / values[i]) ** (1.0 / span) - 1.0
+
+    return {
+        "correlation": np.atleast_2d(correlation),
+        "rebased": rebased,
+        "rebased_dates": dates[first:],
+        "trailing": trailing,
+    }
@@ -1,21 +1,55 @@
-import requests
 import pandas as pd
+import streamlit as st
+import http_client
+import instrumentation
+import price_store
+from mf_analytics import fund_metrics
+from concurrency import thread_pool
+
+MF_BASE_URL = st.secrets.get("mfapi_base_url", "https://api.mfapi.in/mf")
+NAV_NAMESPACE = "nav"
+
+
+def _fetch_navs(scheme_code, start=None):
+    """Download NAVs from mfapi.in (only those on/after `start` when given) and cache the scheme meta."""
+    params = None
+    if start is not None:
+        params = {"startDate": start.strftime("%Y-%m-%d"), "endDate": pd.Timestamp.today().strftime("%Y-%m-%d")}
+    res = http_client.get_json(f"{MF_BASE_URL}/{scheme_code}", params=params)
+
+    if "meta" not in res or "data" not in res:
+        raise ValueError("Invalid or missing mutual fund data.")
+    price_store.write_meta(scheme_code, res["meta"], namespace=NAV_NAMESPACE)
+
+    nav_df = pd.DataFrame(res["data"], columns=["date", "nav"])
+    nav_df["date"] = pd.to_datetime(nav_df["date"], format="%d-%m-%Y", errors="coerce")
+    nav_df["nav"] = pd.to_numeric(nav_df["nav"], errors="coerce")
+    return nav_df.dropna().set_index("date")
+
+
+def get_nav_history(scheme_code, period="max"):
+    """Full (or `period`-sliced) NAV series from the local store, refreshed incrementally."""
+    try:
+        price_store.sync(scheme_code, _fetch_navs, namespace=NAV_NAMESPACE)
+    except Exception:
+        if price_store.last_date(scheme_code, namespace=NAV_NAMESPACE) is None:
+            raise
+    return price_store.read(scheme_code, period, namespace=NAV_NAMESPACE)
+
 
 def get_mutual_fund_data(scheme_code="120828"):
-    """Fetch mutual fund info and NAV data from mfapi.in with graceful fallbacks."""
+    """Fetch mutual fund info, full NAV history and return metrics with graceful fallbacks."""
     try:
-        url = f"https://api.mfapi.in/mf/{scheme_code}"
-        res = requests.get(url).json()
+        try:
+            navs = get_nav_history(scheme_code)
+        except ValueError as e:
+            return {"error": str(e)}
 
-        if "meta" not in res or "data" not in res:
+        meta = price_store.read_meta(scheme_code, namespace=NAV_NAMESPACE)
+        if not meta or navs.empty:
             return {"error": "Invalid or missing mutual fund data."}
 
-        meta = res["meta"]
-        navs = res["data"][:30]  # last 30 NAVs
-
-        nav_df = pd.DataFrame(navs)
-        nav_df["date"] = pd.to_datetime(nav_df["date"], format="%d-%m-%Y", errors="coerce")
-        nav_df["nav"] = pd.to_numeric(nav_df["nav"], errors="coerce")
+        nav_df = navs.reset_index()
 
         # Return all fields (safe even if missing)
         return {
@@ -27,8 +61,45 @@ def get_mutual_fund_data(scheme_code="120828"):
             "expense_ratio": meta.get("expense_ratio", "N/A"),
             "aum": meta.get("aum", "N/A"),
             "dividend_info": meta.get("dividend_type", "N/A"),
-            "nav_df": nav_df
+            "nav_df": nav_df,
+            "metrics": fund_metrics(nav_df["date"].to_numpy(), nav_df["nav"].to_numpy()),
         }
 
     except Exception as e:
         return {"error": f"Failed to fetch mutual fund data: {str(e)}"}
+
+
+# -----------------------------
+# 🔀 Multi-scheme comparison
+# -----------------------------
+def get_nav_matrix(scheme_codes, period="max"):
+    """
+    Fetch many schemes concurrently and align them on one date index.
+    Returns (matrix, names, errors): a dates x schemes float DataFrame with
+    holidays forward-filled, {code: scheme name}, and {code: error message}.
+    """
+    codes = list(dict.fromkeys(c.strip() for c in scheme_codes if c and c.strip()))
+    series, errors = {}, {}
+
+    with thread_pool(len(codes) or 1) as pool:
+        futures = {code: pool.submit(get_nav_history, code, period) for code in codes}
+        for code, future in futures.items():
+            try:
+                navs = future.result()
+            except Exception as e:
+                errors[code] = str(e)
+                continue
+            if navs.empty:
+                errors[code] = "No NAV data."
+            else:
+                series[code] = navs["nav"]
+
+    names = {code: (price_store.read_meta(code, namespace=NAV_NAMESPACE) or {}).get("scheme_name", code) for code in series}
+    if not series:
+        return pd.DataFrame(), names, errors
+
+    matrix = pd.concat(series, axis=1).sort_index().ffill().astype("float64")
+    return matrix, names, errors
+
+
+instrumentation.instrument_module(globals())
@@ -1,129 +1,93 @@
 import streamlit as st
 import pandas as pd
-from kite_api import get_holdings, get_positions
-from fmp_api import get_latest_price  # ✅ FMP fallback added
-from fmp_api import get_historical_data  # optional for insights
+from snapshot import get_snapshot  # ✅ one shared fetch for all three tabs
+from prices import with_live_prices
+from portfolio_analytics import build_frame, totals, display_table
+from risk import return_matrix, portfolio_risk
+
+
+def _show_book(df, label):
+    t = totals(df)
+    c1, c2, c3 = st.columns(3)
+    c1.metric(f"Total {label} Value (₹)", f"{t['value']:,.2f}")
+    c2.metric("Unrealized P&L (₹)", f"{t['unrealized_pnl']:,.2f}",
+              None if pd.isna(t["pnl_pct"]) else f"{t['pnl_pct']:.2f}%")
+    c3.metric("Day Change (₹)", f"{t['day_change']:,.2f}")
+    st.dataframe(display_table(df), use_container_width=True)
+
+
+def _show_risk(holdings):
+    book = holdings.groupby("symbol")["value"].sum()
+    returns, missing = return_matrix(book.index.tolist(), period="5y")
+    if missing:
+        st.warning(f"No price history for: {', '.join(missing)}")
+    if returns.empty:
+        return
+
+    report, per_holding = portfolio_risk(returns, (book / book.abs().sum()).to_dict(), float(book.sum()))
+    cols = st.columns(4)
+    for i, (label, value) in enumerate(report.items()):
+        if label.endswith("(₹)"):
+            shown = f"{value:,.0f}"
+        elif label.startswith("Volatility"):
+            shown = f"{value:.2%}"
+        else:
+            shown = f"{value:,.2f}" if isinstance(value, float) else str(value)
+        cols[i % 4].metric(label, shown)
+    st.dataframe(per_holding.round(4), use_container_width=True)
+
+
+@st.fragment
+def _risk_view(frame):
+    """Its button reruns only this tab, so the 5y history pull never re-renders the books."""
+    st.subheader("Risk (holdings vs NIFTY 50)")
+    holdings = frame[(frame["source"] == "holding") & (frame["value"] != 0)]
+    if holdings.empty:
+        st.info("No holdings to assess.")
+    elif st.button("Compute risk"):
+        _show_risk(holdings)
+
 
 # --- Portfolio Display ---
 def show_portfolio_summary():
     st.title("📈 Portfolio Analyzer")
 
-    tabs = st.tabs(["Holdings", "Positions", "Summary"])
+    snap = get_snapshot(force=st.button("🔄 Refresh portfolio"))
+    for err in snap["errors"]:
+        st.error(err)
+    prices = with_live_prices(snap["prices"])  # ⚡ streamed ticks beat the snapshot's REST prices
+
+    # One vectorized frame for every tab
+    frame = build_frame(snap["holdings"], snap["positions"], prices)
+
+    tabs = st.tabs(["Holdings", "Positions", "Summary", "Risk"])
 
     # --- Tab 1: Holdings ---
     with tabs[0]:
         st.subheader("Holdings")
-
-        try:
-            holdings = get_holdings() or []
-        except Exception as e:
-            st.error(f"Error fetching holdings: {e}")
-            holdings = []
-
-        if not isinstance(holdings, list):
-            holdings = [holdings]
-
-        if not holdings:
+        holdings = frame[frame["source"] == "holding"]
+        if holdings.empty:
             st.info("No holdings found.")
         else:
-            data = []
-            for h in holdings:
-                symbol = h.get("tradingsymbol") or h.get("symbol")
-                qty = h.get("quantity", 0)
-                last_price = h.get("last_price", 0) or 0
-
-                # ✅ fallback via FMP
-                if not last_price or last_price == 0:
-                    last_price = get_latest_price(symbol)
-
-                value = qty * last_price
-                data.append({
-                    "Symbol": symbol,
-                    "Quantity": qty,
-                    "Last Price (₹)": round(last_price, 2),
-                    "Value (₹)": round(value, 2),
-                })
-
-            df = pd.DataFrame(data)
-            total_value = df["Value (₹)"].sum()
-
-            st.metric("Total Holdings Value (₹)", f"{total_value:,.2f}")
-            st.dataframe(df, use_container_width=True)
+            _show_book(holdings, "Holdings")
 
     # --- Tab 2: Positions ---
     with tabs[1]:
         st.subheader("Positions")
-
-        try:
-            positions = get_positions() or []
-        except Exception as e:
-            st.error(f"Error fetching positions: {e}")
-            positions = []
-
-        if not isinstance(positions, list):
-            positions = [positions]
-
-        if not positions:
+        positions = frame[frame["source"] == "position"]
+        if positions.empty:
             st.info("No positions found.")
         else:
-            data = []
-            for p in positions:
-                symbol = p.get("tradingsymbol") or p.get("symbol")
-                qty = p.get("quantity", 0)
-                last_price = p.get("last_price", 0) or 0
-
-                # ✅ fallback via FMP
-                if not last_price or last_price == 0:
-                    last_price = get_latest_price(symbol)
-
-                value = qty * last_price
-                data.append({
-                    "Symbol": symbol,
-                    "Quantity": qty,
-                    "Last Price (₹)": round(last_price, 2),
-                    "Value (₹)": round(value, 2),
-                })
-
-            df = pd.DataFrame(data)
-            total_value = df["Value (₹)"].sum()
-
-            st.metric("Total Positions Value (₹)", f"{total_value:,.2f}")
-            st.dataframe(df, use_container_width=True)
+            _show_book(positions, "Positions")
 
     # --- Tab 3: Summary ---
     with tabs[2]:
         st.subheader("Portfolio Summary")
-
-        try:
-            holdings = get_holdings() or []
-            positions = get_positions() or []
-        except Exception as e:
-            st.error(f"Error fetching portfolio summary: {e}")
-            return
-
-        all_data = holdings + positions
-        if not all_data:
+        if frame.empty:
             st.info("No portfolio data available.")
-            return
-
-        summary = []
-        for item in all_data:
-            symbol = item.get("tradingsymbol") or item.get("symbol")
-            qty = item.get("quantity", 0)
-            last_price = item.get("last_price", 0) or 0
-
-            if not last_price or last_price == 0:
-                last_price = get_latest_price(symbol)
-
-            summary.append({
-                "Symbol": symbol,
-                "Quantity": qty,
-                "Last Price (₹)": round(last_price, 2),
-                "Value (₹)": round(qty * last_price, 2),
-            })
-
-        df = pd.DataFrame(summary)
-        total_value = df["Value (₹)"].sum()
+        else:
+            _show_book(frame, "Portfolio")
 
-        st.metric("Total Portfolio Value (₹)", f"{total_value:,.2f}")
-        st.dataframe(df, use_container_width=True)
+    # --- Tab 4: Risk ---
+    with tabs[3]:
+        _risk_view(frame)
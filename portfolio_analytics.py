@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+# Kite fields pulled from holdings/positions rows; anything missing becomes NaN/0
+RAW_COLUMNS = ["tradingsymbol", "exchange", "instrument_token", "quantity", "t1_quantity",
+               "average_price", "last_price", "close_price", "pnl", "day_change"]
+
+DISPLAY_COLUMNS = {
+    "account": "Account",
+    "symbol": "Symbol",
+    "quantity": "Quantity",
+    "average_price": "Avg Price (₹)",
+    "last_price": "Last Price (₹)",
+    "value": "Value (₹)",
+    "invested": "Invested (₹)",
+    "unrealized_pnl": "P&L (₹)",
+    "pnl_pct": "P&L %",
+    "day_change_value": "Day Change (₹)",
+    "weight": "Weight %",
+}
+
+
+# -----------------------------
+# 🧮 Columnar Portfolio Frame
+# -----------------------------
+def _rows_frame(rows, source, account):
+    df = pd.DataFrame.from_records(rows or [], columns=RAW_COLUMNS)
+    df["source"] = source
+    df["account"] = account
+    return df
+
+
+def build_frame(holdings, positions, prices=None, account="default"):
+    """
+    Load holdings and positions into one columnar frame and derive value,
+    invested capital, unrealized P&L, P&L %, day change and weights.
+    `prices` ({symbol: price}) overrides Kite's last_price where given.
+    No rounding here; see display_table.
+    """
+    df = pd.concat([_rows_frame(holdings, "holding", account),
+                    _rows_frame(positions, "position", account)], ignore_index=True)
+    return derive(df, prices)
+
+
+def combine(frames):
+    """Stack frames from several accounts and recompute book-wide weights."""
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return derive(_rows_frame([], "holding", "default"))
+    return _with_weights(pd.concat(frames, ignore_index=True))
+
+
+def derive(df, prices=None):
+    df = df.rename(columns={"tradingsymbol": "symbol"})
+    num = ["quantity", "t1_quantity", "average_price", "last_price", "close_price", "pnl", "day_change"]
+    df[num] = df[num].apply(pd.to_numeric, errors="coerce").fillna(0.0).astype(np.float64)
+    df["exchange"] = df["exchange"].fillna("NSE")
+
+    if prices:
+        override = df["symbol"].map(prices).astype(np.float64)
+        df["last_price"] = override.where(override > 0, df["last_price"])
+
+    qty = df["quantity"].to_numpy() + df["t1_quantity"].to_numpy()
+    last = df["last_price"].to_numpy()
+    avg = df["average_price"].to_numpy()
+    close = df["close_price"].to_numpy()
+
+    df["quantity"] = qty
+    df["value"] = qty * last
+    df["invested"] = qty * avg
+    df["unrealized_pnl"] = df["value"] - df["invested"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["pnl_pct"] = np.where(df["invested"] != 0, df["unrealized_pnl"] / np.abs(df["invested"]) * 100, np.nan)
+
+    # Per-share day change: from the previous close when Kite sent one, else Kite's own field
+    per_share = np.where(close > 0, last - close, df["day_change"].to_numpy())
+    df["day_change_value"] = qty * per_share
+    return _with_weights(df)
+
+
+def _with_weights(df):
+    gross = np.abs(df["value"].to_numpy()).sum()
+    df["weight"] = df["value"] / gross * 100 if gross else 0.0
+    return df
+
+
+# -----------------------------
+# 📋 Aggregates & Display
+# -----------------------------
+def totals(df):
+    """Book-level sums as plain floats."""
+    invested = float(df["invested"].sum())
+    pnl = float(df["unrealized_pnl"].sum())
+    return {
+        "value": float(df["value"].sum()),
+        "invested": invested,
+        "unrealized_pnl": pnl,
+        "pnl_pct": pnl / abs(invested) * 100 if invested else float("nan"),
+        "day_change": float(df["day_change_value"].sum()),
+    }
+
+
+def display_table(df):
+    """Rounded, relabelled copy for st.dataframe; the source frame keeps full precision."""
+    cols = [c for c in DISPLAY_COLUMNS if c in df.columns]
+    if df["account"].nunique() <= 1:
+        cols.remove("account")
+    return df[cols].round(2).rename(columns=DISPLAY_COLUMNS).reset_index(drop=True)
+
+
+# -----------------------------
+# 🧾 Compact LLM Digest
+# -----------------------------
+# SEBI-style buckets on FMP's INR market cap
+LARGE_CAP = 2e11   # ₹20,000 cr
+MID_CAP = 5e10     # ₹5,000 cr
+
+
+def _cap_bucket(mkt_cap):
+    if not mkt_cap or pd.isna(mkt_cap):
+        return "Unknown"
+    return "Large" if mkt_cap >= LARGE_CAP else "Mid" if mkt_cap >= MID_CAP else "Small"
+
+
+def _weights_line(label, series):
+    return f"{label} " + ",".join(f"{k}={v:.1f}%" for k, v in series.sort_values(ascending=False).items())
+
+
+def digest(df, profiles=None, top_n=5):
+    """
+    Fixed-schema text summary of a portfolio frame for LLM prompts: totals,
+    concentration, sector and market-cap weights, and CSV tables of the
+    top/bottom `top_n` lines by P&L % plus the largest by weight (every line
+    when the book is small).
+    """
+    if df.empty:
+        return "TOTALS lines=0"
+
+    book = df.groupby("symbol", as_index=False)[["quantity", "value", "invested", "unrealized_pnl", "day_change_value"]].sum()
+    book["last_price"] = np.where(book["quantity"] != 0, book["value"] / book["quantity"], 0.0)
+    book["average_price"] = np.where(book["quantity"] != 0, book["invested"] / book["quantity"], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        book["pnl_pct"] = np.where(book["invested"] != 0, book["unrealized_pnl"] / np.abs(book["invested"]) * 100, np.nan)
+    gross = np.abs(book["value"]).sum()
+    book["weight"] = book["value"] / gross * 100 if gross else 0.0
+
+    t = totals(df)
+    w = np.sort(np.abs(book["weight"].to_numpy()) / 100)[::-1]
+    hhi = float((w ** 2).sum())
+    lines = [
+        f"TOTALS lines={len(book)},value={t['value']:.0f},invested={t['invested']:.0f},"
+        f"pnl={t['unrealized_pnl']:.0f},pnl_pct={t['pnl_pct']:.2f},day_change={t['day_change']:.0f}",
+        f"CONCENTRATION top1={w[:1].sum() * 100:.1f}%,top5={w[:5].sum() * 100:.1f}%,"
+        f"hhi={hhi:.3f},effective_n={1 / hhi if hhi else 0:.1f}",
+    ]
+
+    if profiles:
+        sector = book["symbol"].map(lambda s: (profiles.get(s) or {}).get("sector") or "Unknown")
+        cap = book["symbol"].map(lambda s: _cap_bucket((profiles.get(s) or {}).get("mktCap")))
+        lines.append(_weights_line("SECTORS", book["weight"].groupby(sector).sum()))
+        lines.append(_weights_line("MCAP", book["weight"].groupby(cap).sum()))
+
+    cols = ["symbol", "quantity", "average_price", "last_price", "value", "weight", "pnl_pct"]
+    ranked = book.sort_values("pnl_pct", ascending=False, na_position="last")
+    if len(book) <= 2 * top_n:
+        sections = [("ALL", ranked)]
+    else:
+        sections = [("TOP", ranked.head(top_n)),
+                    ("BOTTOM", ranked.dropna(subset=["pnl_pct"]).tail(top_n).iloc[::-1]),
+                    ("LARGEST", book.nlargest(top_n, "weight"))]
+    for label, part in sections:
+        lines.append(f"{label} ({len(part)} of {len(book)})")
+        lines.append(part[cols].round(2).to_csv(index=False, header=True).strip())
+
+    return "\n".join(lines)
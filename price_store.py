@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import streamlit as st
+
+# --- Local store layout: <data_dir>/<namespace>/<KEY>.parquet (prices, nav, ...) ---
+DATA_DIR = Path(st.secrets.get("data_dir", ".cache"))
+
+# A key checked upstream within this window is served from disk with no network call
+REFRESH_AFTER = 6 * 3600
+
+# Relative adjClose change on the re-fetched last bar that counts as an upstream restatement
+ADJ_TOLERANCE = 1e-6
+
+PERIOD_OFFSETS = {
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+# -----------------------------
+# 🧰 Helpers
+# -----------------------------
+def _path(symbol, namespace="prices", suffix=".parquet"):
+    return DATA_DIR / namespace / f"{str(symbol).upper().replace('/', '_')}{suffix}"
+
+
+def _lock(symbol, namespace):
+    with _locks_guard:
+        return _locks.setdefault((namespace, str(symbol).upper()), threading.Lock())
+
+
+def _read_table(symbol, namespace="prices"):
+    path = _path(symbol, namespace)
+    if not path.exists():
+        return None
+    return pq.read_table(path, memory_map=True)
+
+
+def _period_start(period, last_date):
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=last_date.year, month=1, day=1)
+    return last_date - PERIOD_OFFSETS.get(period, PERIOD_OFFSETS["6mo"])
+
+
+# -----------------------------
+# 💾 Incremental Series Store (OHLC, NAV)
+# -----------------------------
+def last_date(symbol, namespace="prices"):
+    """Most recent stored bar date, or None if nothing is stored."""
+    table = _read_table(symbol, namespace)
+    if table is None or table.num_rows == 0:
+        return None
+    return pd.Timestamp(pc.max(table["date"]).as_py())
+
+
+def _restated(old, new, last):
+    """True when the fresh copy of the last stored bar has a different adjClose (split/dividend restatement)."""
+    if "adjClose" not in old.columns or "adjClose" not in new.columns:
+        return False
+    stored = old.loc[old["date"] == last, "adjClose"]
+    fresh = new.loc[new["date"] == last, "adjClose"]
+    if stored.empty or fresh.empty or pd.isna(stored.iloc[-1]) or pd.isna(fresh.iloc[-1]):
+        return False
+    return abs(float(fresh.iloc[-1]) - float(stored.iloc[-1])) > ADJ_TOLERANCE * abs(float(stored.iloc[-1]))
+
+
+def sync(symbol, fetch, refresh_after=REFRESH_AFTER, namespace="prices"):
+    """
+    Bring the stored series up to date.
+    `fetch(symbol, start)` must return a date-indexed OHLC frame of bars on/after
+    `start` (or the full history when start is None). The last stored bar is
+    fetched again and replaced (it may have been an intraday partial); if its
+    adjClose was restated upstream, the whole series is downloaded again.
+    """
+    path = _path(symbol, namespace)
+    with _lock(symbol, namespace):
+        if path.exists() and time.time() - path.stat().st_mtime < refresh_after:
+            return
+
+        last = last_date(symbol, namespace)
+        new = fetch(symbol, last)
+
+        if new is None or new.empty:
+            if path.exists():
+                os.utime(path)  # mark as checked so reruns stay local
+            return
+
+        new = new.reset_index()
+        if last is not None:
+            old = _read_table(symbol, namespace).to_pandas()
+            if _restated(old, new, last):
+                full = fetch(symbol, None)
+                if full is not None and not full.empty:
+                    old, new = None, full.reset_index()
+            if old is not None:
+                new = pd.concat([old[old["date"] < last], new[new["date"] >= last]], ignore_index=True)
+        new = new.drop_duplicates("date", keep="last").sort_values("date")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(pa.Table.from_pandas(new, preserve_index=False), tmp)
+        os.replace(tmp, path)
+
+
+def read(symbol, period="6mo", namespace="prices"):
+    """Serve a `period` slice (5d/1mo/3mo/6mo/1y/2y/5y/10y/ytd/max) from disk."""
+    table = _read_table(symbol, namespace)
+    if table is None or table.num_rows == 0:
+        return pd.DataFrame()
+
+    start = _period_start(period, pd.Timestamp(pc.max(table["date"]).as_py()))
+    if start is not None:
+        table = table.filter(pc.greater_equal(table["date"], pa.scalar(start.to_pydatetime(), table["date"].type)))
+
+    # Slice in Arrow first so only the requested rows are materialized
+    return table.to_pandas(split_blocks=True).set_index("date")
+
+
+def write_meta(symbol, meta, namespace="prices"):
+    """Store a small JSON sidecar (e.g. scheme metadata) next to the series."""
+    path = _path(symbol, namespace, suffix=".json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, path)
+
+
+def read_meta(symbol, namespace="prices"):
+    path = _path(symbol, namespace, suffix=".json")
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
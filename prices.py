@@ -0,0 +1,48 @@
+import ticker
+from kite_api import get_ltp, track_instruments
+from fmp_api import get_latest_prices as get_fmp_prices
+
+
+# -----------------------------
+# 💱 Batched Price Resolution
+# -----------------------------
+def get_latest_prices(symbols):
+    """
+    Resolve latest prices for many symbols at once.
+    One multi-instrument Kite ltp() call first, then one batched FMP /quote
+    request for whatever Kite could not price. Returns {symbol: price}.
+    """
+    symbols = [s for s in dict.fromkeys(symbols) if s]
+    if not symbols:
+        return {}
+
+    prices = get_ltp(symbols)
+    missing = [s for s in symbols if not prices.get(s)]
+    if missing:
+        prices.update(get_fmp_prices(missing))
+
+    return {s: prices.get(s, 0.0) for s in symbols}
+
+
+def fill_missing_prices(items):
+    """Return {symbol: last_price} for Kite rows, batch-filling rows whose last_price is 0."""
+    track_instruments(items)
+    prices, missing = {}, []
+    for item in items:
+        symbol = item.get("tradingsymbol") or item.get("symbol")
+        last_price = item.get("last_price", 0) or 0
+        if last_price:
+            prices[symbol] = last_price
+        else:
+            missing.append(symbol)
+
+    missing = [s for s in missing if s not in prices]
+    if missing:
+        prices.update(get_latest_prices(missing))
+    return prices
+
+
+def with_live_prices(prices, exchange="NSE"):
+    """Overlay streamed ticks on a {symbol: price} map; reads the tick store only, no REST."""
+    streamed = ticker.get_prices([f"{exchange}:{s}" for s in prices])
+    return {s: streamed.get(f"{exchange}:{s}", p) for s, p in prices.items()}
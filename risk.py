@@ -0,0 +1,190 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from concurrency import thread_pool
+from market_data import get_history
+
+TRADING_DAYS = 252
+BENCHMARK = st.secrets.get("risk_benchmark", "^NSEI")  # NIFTY 50 on FMP
+CONFIDENCE_LEVELS = (0.95, 0.99)
+# Standard normal quantiles/densities for the parametric VaR levels above (avoids a SciPy dependency)
+_Z = {0.95: 1.6448536, 0.99: 2.3263479}
+_PDF = {0.95: 0.1031356, 0.99: 0.0266521}
+
+
+# -----------------------------
+# 📐 Incremental Covariance
+# -----------------------------
+class IncrementalCovariance:
+    """Running mean and co-moment matrix; appending or removing a batch of days costs O(batch * k^2)."""
+
+    def __init__(self, k):
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros((k, k))
+
+    def append(self, rows):
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        n_b = len(rows)
+        if n_b == 0:
+            return
+        mean_b = rows.mean(axis=0)
+        centered = rows - mean_b
+        m2_b = centered.T @ centered
+
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.m2 += m2_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean += delta * (n_b / n)
+        self.n = n
+
+    def remove(self, rows):
+        """Downdate: take back a batch of rows that were appended earlier (they left the window)."""
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        n_b = len(rows)
+        if n_b == 0:
+            return
+        n = self.n - n_b
+        if n <= 0:
+            self.__init__(len(self.mean))
+            return
+        mean_b = rows.mean(axis=0)
+        centered = rows - mean_b
+        mean = (self.mean * self.n - mean_b * n_b) / n
+        delta = mean_b - mean
+        self.m2 -= centered.T @ centered + np.outer(delta, delta) * (n * n_b / self.n)
+        self.mean = mean
+        self.n = n
+
+    @property
+    def cov(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.full_like(self.m2, np.nan)
+
+
+# -----------------------------
+# 🧱 Aligned Return Matrix
+# -----------------------------
+def _closes(symbol, period):
+    df = get_history(symbol, period=period)
+    if df.empty:
+        return None
+    col = "adjClose" if "adjClose" in df.columns else "close"
+    return df[col].astype(np.float64)
+
+
+def return_matrix(symbols, period="5y", benchmark=BENCHMARK):
+    """
+    Daily simple returns for `symbols` (+ benchmark as the last column) on one date index.
+    Prices are forward-filled over holidays/suspensions; rows before every series has
+    started are dropped. Symbols with no history are returned in `missing`.
+    """
+    names = list(dict.fromkeys(symbols)) + ([benchmark] if benchmark else [])
+    with thread_pool(len(names) or 1) as pool:
+        closes = dict(zip(names, pool.map(lambda s: _closes(s, period), names)))
+
+    missing = [s for s, c in closes.items() if c is None]
+    present = {s: c for s, c in closes.items() if c is not None}
+    if not present:
+        return pd.DataFrame(), missing
+
+    prices = pd.concat(present, axis=1).sort_index().ffill().dropna()
+    returns = prices.pct_change().iloc[1:]
+    return returns, missing
+
+
+_state_lock = threading.Lock()
+_states = {}      # columns -> (return window merged so far, IncrementalCovariance)
+MAX_STATES = 32   # distinct column sets (portfolios) kept; least recently used is dropped
+
+
+def _same_overlap(prev, returns):
+    """Rows shared with the last call are unchanged (a late bar re-fills forward-filled days, and splits restate)."""
+    shared = returns.index[returns.index <= prev.index[-1]]
+    if not shared.isin(prev.index).all():
+        return False
+    return np.array_equal(prev.loc[shared].to_numpy(), returns.loc[shared].to_numpy(), equal_nan=True)
+
+
+def covariance(returns):
+    """
+    Covariance of a return matrix. For a column set seen before, days that slid out of
+    the window are downdated and only days newer than the last call are merged in;
+    if any overlapping day changed since then, it is rebuilt from scratch.
+    """
+    key = tuple(returns.columns)
+    with _state_lock:
+        prev, acc = _states.pop(key, (None, None))
+        if (acc is None or not len(returns) or not len(prev)
+                or returns.index[0] < prev.index[0] or prev.index[-1] not in returns.index
+                or not _same_overlap(prev, returns)):
+            acc = IncrementalCovariance(returns.shape[1])
+            acc.append(returns.to_numpy())
+        else:
+            acc.remove(prev.loc[prev.index < returns.index[0]].to_numpy())
+            acc.append(returns.loc[returns.index > prev.index[-1]].to_numpy())
+        _states[key] = (returns, acc)
+        while len(_states) > MAX_STATES:
+            _states.pop(next(iter(_states)))
+        return acc.cov
+
+
+# -----------------------------
+# ⚠️ Portfolio Risk Metrics
+# -----------------------------
+def portfolio_risk(returns, weights, portfolio_value, benchmark=BENCHMARK):
+    """
+    Vectorized risk report for `weights` ({symbol: fraction}) over a return matrix
+    that may include the benchmark column. Returns a dict of scalars plus a per-holding frame.
+    """
+    cov_all = covariance(returns)
+    cols = list(returns.columns)
+    has_bench = benchmark in cols
+    assets = [c for c in cols if c != benchmark]
+    idx = np.array([cols.index(a) for a in assets], dtype=int)
+
+    w = np.array([weights.get(a, 0.0) for a in assets], dtype=np.float64)
+    if np.abs(w).sum():
+        w = w / np.abs(w).sum()
+
+    R = returns[assets].to_numpy()
+    cov = cov_all[np.ix_(idx, idx)]
+    port = R @ w
+    sigma = float(np.sqrt(w @ cov @ w))
+    mu = float(port.mean()) if len(port) else np.nan
+
+    report = {
+        "Volatility (daily)": sigma,
+        "Volatility (ann.)": sigma * np.sqrt(TRADING_DAYS),
+        "Observations": len(port),
+    }
+    for level in CONFIDENCE_LEVELS:
+        pct = int(level * 100)
+        hist_var = -np.quantile(port, 1 - level) if len(port) else np.nan
+        tail = port[port <= -hist_var]
+        hist_cvar = -tail.mean() if len(tail) else np.nan
+        para_var = -(mu - _Z[level] * sigma)
+        para_cvar = -(mu - sigma * _PDF[level] / (1 - level))
+        report[f"Historical VaR {pct}% (₹)"] = hist_var * portfolio_value
+        report[f"Historical CVaR {pct}% (₹)"] = hist_cvar * portfolio_value
+        report[f"Parametric VaR {pct}% (₹)"] = para_var * portfolio_value
+        report[f"Parametric CVaR {pct}% (₹)"] = para_cvar * portfolio_value
+
+    marginal = cov @ w / sigma if sigma else np.zeros_like(w)
+    contribution = w * marginal
+    per_holding = pd.DataFrame({
+        "Weight %": w * 100,
+        "Marginal Risk": marginal,
+        "Risk Contribution %": contribution / sigma * 100 if sigma else 0.0,
+    }, index=assets)
+
+    if has_bench:
+        b = cols.index(benchmark)
+        var_m = cov_all[b, b]
+        betas = cov_all[idx, b] / var_m if var_m else np.full(len(idx), np.nan)
+        per_holding["Beta"] = betas
+        report["Portfolio Beta"] = float(w @ betas)
+
+    return report, per_holding
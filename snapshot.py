@@ -0,0 +1,98 @@
+import threading
+import time
+
+import streamlit as st
+
+import instrumentation
+import kite_api
+from prices import fill_missing_prices
+
+# Seconds a fetched snapshot stays fresh; override with snapshot_ttl_seconds in secrets.toml
+SNAPSHOT_TTL = float(st.secrets.get("snapshot_ttl_seconds", 30))
+
+_lock = threading.Lock()
+_cache = {}      # client key -> snapshot dict
+_inflight = {}   # client key -> threading.Event for the fetch in progress
+
+
+# -----------------------------
+# 🧰 Helpers
+# -----------------------------
+def _client_key():
+    """Snapshots are per broker user, so every session of the same user shares one."""
+    return kite_api.client_key()
+
+
+def _as_rows(result, label, errors):
+    """Normalize a kite_api result into a list of rows, collecting error dicts."""
+    if isinstance(result, dict):
+        if "error" in result:
+            errors.append(f"Error fetching {label}: {result['error']}")
+            return []
+        return [result]
+    return list(result or [])
+
+
+def _fetch():
+    errors = []
+    holdings = _as_rows(kite_api.get_holdings(), "holdings", errors)
+    positions = _as_rows(kite_api.get_positions(), "positions", errors)
+    return {
+        "holdings": holdings,
+        "positions": positions,
+        "prices": fill_missing_prices(holdings + positions),
+        "errors": errors,
+        "fetched_at": time.time(),
+    }
+
+
+# -----------------------------
+# 📸 Shared Portfolio Snapshot
+# -----------------------------
+def get_snapshot(force=False, ttl=None):
+    """
+    Return holdings, positions and resolved prices for the active login.
+    Results are shared across sessions for `ttl` seconds, and concurrent callers
+    that miss the cache wait on a single in-flight fetch instead of starting their own.
+    """
+    ttl = SNAPSHOT_TTL if ttl is None else ttl
+    key = _client_key()
+    if key is None:
+        return _fetch()  # no login: nothing worth sharing, and a "session expired" error is this session's alone
+
+    while True:
+        with _lock:
+            snap = _cache.get(key)
+            if snap and not force and time.time() - snap["fetched_at"] < ttl:
+                instrumentation.record_cache("snapshot", hit=True)
+                return snap
+            event = _inflight.get(key)
+            leader = event is None
+            if leader:
+                event = _inflight[key] = threading.Event()
+
+        if leader:
+            break
+        event.wait()
+        with _lock:
+            snap = _cache.get(key)
+        if snap:
+            return snap
+        # the leader failed; loop round and try to become the leader ourselves
+
+    instrumentation.record_cache("snapshot", hit=False)
+    try:
+        snap = _fetch()
+        with _lock:
+            _cache[key] = snap
+        return snap
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        event.set()
+
+
+def invalidate():
+    """Drop the cached snapshot so the next read refetches (e.g. after an order)."""
+    with _lock:
+        _cache.pop(_client_key(), None)
@@ -0,0 +1,61 @@
+"""
+IncrementalCovariance append/remove against np.cov.
+
+risk.py reads st.secrets at import, so the class is loaded from its source on
+its own (it only needs numpy) rather than importing the app module.
+"""
+import ast
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+RISK = Path(__file__).resolve().parents[1] / "risk.py"
+
+
+def _incremental_covariance():
+    tree = ast.parse(RISK.read_text())
+    node = next(n for n in tree.body if isinstance(n, ast.ClassDef) and n.name == "IncrementalCovariance")
+    namespace = {"np": np}
+    exec(compile(ast.Module(body=[node], type_ignores=[]), str(RISK), "exec"), namespace)
+    return namespace["IncrementalCovariance"]
+
+
+@pytest.fixture(scope="module")
+def cov_cls():
+    return _incremental_covariance()
+
+
+@pytest.fixture
+def rows():
+    return np.random.default_rng(7).normal(0.0005, 0.02, size=(300, 4))
+
+
+def test_append_in_batches_matches_np_cov(cov_cls, rows):
+    acc = cov_cls(rows.shape[1])
+    for batch in np.array_split(rows, [1, 50, 51, 200]):
+        acc.append(batch)
+    assert acc.n == len(rows)
+    np.testing.assert_allclose(acc.cov, np.cov(rows, rowvar=False), rtol=1e-10, atol=1e-14)
+
+
+def test_sliding_window_with_remove_matches_np_cov(cov_cls, rows):
+    acc = cov_cls(rows.shape[1])
+    acc.append(rows[:200])
+    lo, hi = 0, 200
+    for new_hi in (210, 211, 260, 300):
+        acc.append(rows[hi:new_hi])
+        new_lo = new_hi - 200
+        acc.remove(rows[lo:new_lo])
+        lo, hi = new_lo, new_hi
+        assert acc.n == hi - lo
+        np.testing.assert_allclose(acc.cov, np.cov(rows[lo:hi], rowvar=False), rtol=1e-9, atol=1e-14)
+
+
+def test_remove_everything_resets(cov_cls, rows):
+    acc = cov_cls(rows.shape[1])
+    acc.append(rows[:10])
+    acc.remove(rows[:10])
+    assert acc.n == 0
+    assert np.isnan(acc.cov).all()
@@ -0,0 +1,154 @@
+import threading
+import time
+
+import numpy as np
+
+# KiteTicker allows 3000 instruments per connection; slots are preallocated up front
+CAPACITY = 3000
+
+# --- Tick store: one slot per subscribed instrument ---
+_ltp = np.zeros(CAPACITY, dtype=np.float64)
+_updated = np.zeros(CAPACITY, dtype=np.float64)  # epoch seconds of the last tick, 0 = never
+_slots = {}      # instrument_token -> slot
+_keys = {}       # "EXCHANGE:SYMBOL" -> instrument_token
+_names = {}      # instrument_token -> "EXCHANGE:SYMBOL"
+_listeners = []  # callables fed [(key, price), ...] for every tick batch
+
+_ticker = None
+_access_token = None
+_connected = False
+_lock = threading.Lock()  # guards subscription changes only; reads never take it
+
+
+# -----------------------------
+# 📡 WebSocket callbacks (ticker thread)
+# -----------------------------
+def _on_ticks(ws, ticks):
+    now = time.time()
+    for tick in ticks:
+        slot = _slots.get(tick["instrument_token"])
+        if slot is not None:
+            _ltp[slot] = tick["last_price"]
+            _updated[slot] = now
+    if _listeners:
+        updates = [(_names[t["instrument_token"]], t["last_price"]) for t in ticks if t["instrument_token"] in _names]
+        for listener in _listeners:
+            try:
+                listener(updates)
+            except Exception:
+                pass  # a bad listener must not kill the tick thread
+
+
+def _on_connect(ws, response):
+    global _connected
+    _connected = True
+    tokens = list(_slots)
+    if tokens:
+        ws.subscribe(tokens)
+        ws.set_mode(ws.MODE_LTP, tokens)
+
+
+def _on_close(ws, code, reason):
+    global _connected
+    _connected = False
+
+
+# -----------------------------
+# 🔌 Lifecycle
+# -----------------------------
+def ensure_started(api_key, access_token):
+    """Start the process-wide ticker, or restart it on `access_token` if the current one is down."""
+    global _ticker, _access_token
+    if not api_key or not access_token:
+        return
+    with _lock:
+        # Ticks are the same for every user: keep whichever connection is up and only
+        # switch tokens once it has dropped (e.g. its token expired)
+        if _ticker is not None and (_connected or _access_token == access_token):
+            return
+        if _ticker is not None:
+            _ticker.close()
+
+        from kiteconnect import KiteTicker  # deferred until a stream is actually needed
+        _ticker = KiteTicker(api_key, access_token)
+        _ticker.on_ticks = _on_ticks
+        _ticker.on_connect = _on_connect
+        _ticker.on_close = _on_close
+        _access_token = access_token
+        _ticker.connect(threaded=True)
+
+
+def stop():
+    global _ticker, _access_token, _connected
+    with _lock:
+        if _ticker is not None:
+            _ticker.close()
+        _ticker, _access_token, _connected = None, None, False
+
+
+def is_streaming():
+    return _connected
+
+
+# -----------------------------
+# 📝 Subscriptions
+# -----------------------------
+def register(key, instrument_token, last_price=0.0):
+    """
+    Track `key` ("NSE:INFY") under its instrument token and subscribe to it.
+    `last_price` seeds the slot so reads work before the first tick arrives.
+    """
+    with _lock:
+        slot = _slots.get(instrument_token)
+        if slot is None:
+            if len(_slots) >= CAPACITY:
+                return False
+            slot = len(_slots)
+            _ltp[slot] = last_price or 0.0
+            _updated[slot] = time.time() if last_price else 0.0
+            _slots[instrument_token] = slot
+            if _ticker is not None and _connected:
+                _ticker.subscribe([instrument_token])
+                _ticker.set_mode(_ticker.MODE_LTP, [instrument_token])
+        _keys[key] = instrument_token
+        _names[instrument_token] = key
+    return True
+
+
+def add_listener(fn):
+    """Call `fn([(key, price), ...])` on the ticker thread for every tick batch; keep it fast."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def is_registered(key):
+    return key in _keys
+
+
+# -----------------------------
+# ⚡ Lock-free reads
+# -----------------------------
+def get_price(key, max_age=None):
+    """
+    Latest streamed price for "EXCHANGE:SYMBOL", or None if unknown, not streaming,
+    or older than `max_age` seconds. With no max_age, an illiquid symbol's last
+    trade stays valid for as long as the stream is up.
+    """
+    token = _keys.get(key)
+    if token is None or not _connected:
+        return None
+    slot = _slots[token]
+    updated = _updated[slot]
+    if not updated or (max_age is not None and time.time() - updated > max_age):
+        return None
+    return float(_ltp[slot])
+
+
+def get_prices(keys, max_age=None):
+    """{key: price} for every key with a fresh streamed price."""
+    prices = {}
+    for key in keys:
+        price = get_price(key, max_age)
+        if price is not None:
+            prices[key] = price
+    return prices
@@ -1,17 +1,45 @@
-import yfinance as yf
+import instrumentation
 
-def get_historical_data(symbol="RELIANCE.NS", period="6mo"):
+# yfinance (and its pandas/requests stack) is imported on first use so pages that
+# only fall back to it don't pay for it at startup.
+
+def fetch_history(symbol="RELIANCE.NS", start=None):
+    """Daily bars on/after `start` (full history when None), unadjusted with an Adj Close column."""
+    import yfinance as yf
     stock = yf.Ticker(symbol)
-    return stock.history(period=period)
+    if start is None:
+        return stock.history(period="max", auto_adjust=False, raise_errors=True)
+    try:
+        return stock.history(start=start.strftime("%Y-%m-%d"), auto_adjust=False, raise_errors=True)
+    except Exception as e:
+        # yfinance raises, rather than returning no rows, for a range with no trading days yet
+        if type(e).__name__ == "YFPricesMissingError" or "no price data found" in str(e).lower():
+            import pandas as pd
+            return pd.DataFrame()
+        raise
+
+def get_latest_price(symbol="RELIANCE.NS"):
+    import yfinance as yf
+    return yf.Ticker(symbol).fast_info["last_price"]
 
 def get_company_info(symbol="RELIANCE.NS"):
+    import yfinance as yf
     stock = yf.Ticker(symbol)
     info = stock.info
     return {
         "Name": info.get("longName"),
         "Sector": info.get("sector"),
+        "Industry": info.get("industry"),
         "Market Cap": info.get("marketCap"),
         "P/E Ratio": info.get("trailingPE"),
         "52 Week High": info.get("fiftyTwoWeekHigh"),
         "52 Week Low": info.get("fiftyTwoWeekLow"),
+        "Beta": info.get("beta"),
+        "Volume": info.get("volume"),
+        "Exchange": info.get("exchange"),
+        "Description": info.get("longBusinessSummary"),
+        "Website": info.get("website"),
     }
+
+
+instrumentation.instrument_module(globals())